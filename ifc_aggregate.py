@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Chart tables from the scraper outputs, without Stata.
+
+Does what "clean up IFC dollar values.do" and the exporting graph of
+"IFC project-level 20251105.do" do, in memory:
+
+  1. joins the project list to the dollar-value extractor output(s) and
+     the export scanner output by project number;
+  2. cleans the dollar values: the larger of the two scraped amounts,
+     capped at the database total; the manual overrides; trade finance
+     flagged and left out of ynotrad; export_hits zeroed where the
+     scanner is known to be wrong;
+  3. sums ynotrad into the wide tables below.
+
+Written to --outdir:
+  ifc_clean.csv            project level, as output/ifc_clean.dta
+  exports.csv              year, y2 y1 y0: manufacturing with / without
+                           export mentions, other industries ($bn; Flourish)
+  exports_by_industry.csv  year x industry, y_export / y_noexport ($bn)
+  income_by_year.csv       year x income level, $m and % shares
+  industry_heatmap.csv     industry x income level, 2020-24, $m
+
+Income levels come from --countries, a CSV with wbcountrycode, year and
+incomelevel (LIC/LMC/UMC/HIC), e.g. output/wdi.dta saved with outsheet.
+As in the do-file, the exports tables use each country's most common
+level and drop countries without one. Without --countries they keep
+every country, and the two income tables are not written.
+
+  python ifc_aggregate.py --projects input/IFC/ifc_investment_services_projects_11-05-2025.csv \\
+    --amounts output/out_ifc_sections_api_2.csv output/out_ifc_sections_api_1.csv \\
+    --exports output/out_ifc_exports2.csv --countries output/wdi.csv --outdir output
+
+The pipeline does the same after its run with --aggregate-dir DIR.
+
+Needs pandas (pip install pandas).
+"""
+
+import argparse, os, re
+from typing import Dict, List, Optional
+
+try:
+    import pandas as pd
+except ImportError:  # optional dependency
+    pd = None
+
+# Amounts in $m, as in the project list
+OVERRIDES = {
+    48853: 10,  # scraper picked up $31 billion; ~$10m per MAD
+    43468: 12,  # web: at most EUR 10m; database: $200m
+    44974: 17,  # web: at most EUR 15m; database: $200m
+}
+DATABASE_TOTAL_IDS = (33800, 37649, 43239)  # keep the database total
+TRADE_FINANCE_TERMS = [
+    "GSCF", "GTLP", "GTSF", "GTFP", "Global Trade Liquidity Program", "Liquidity Program",
+    "Global Trade Supplier Finance", "Trade Finance", "Trade finance", "Supplier Finance", "Supplier finance",
+]
+TRADE_FINANCE_IDS = (34934,)
+NO_EXPORT_IDS = (43582, 34623)  # export mentions that are not about the project's sales
+INCOME_LEVELS = ["LIC", "LMC", "UMC", "HIC"]
+HEATMAP_YEARS = (2020, 2024)
+
+def need_pandas() -> None:
+    if pd is None:
+        raise SystemExit("[fatal] aggregation needs pandas (pip install pandas)")
+
+def stata_name(col: str) -> str:
+    """Variable name Stata's insheet gives a header: lowercase letters, digits and _, 32 chars."""
+    return re.sub(r"[^a-z0-9_]", "", col.lower())[:32]
+
+def _read(path: str) -> "pd.DataFrame":
+    sep = "\t" if path.lower().endswith(".tsv") else ","
+    return pd.read_csv(path, sep=sep, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+
+def _num(s: "pd.Series") -> "pd.Series":
+    return pd.to_numeric(s.str.replace(",", "", regex=False), errors="coerce")
+
+# --------------------------
+# Inputs
+# --------------------------
+def load_projects(path: str) -> "pd.DataFrame":
+    df = _read(path)
+    df.columns = [stata_name(c) for c in df.columns]
+    for c in ("projectnumber", "projectname", "datedisclosed", "industry", "wbcountrycode"):
+        if c not in df.columns:
+            raise SystemExit(f"[fatal] {path}: no {c} column")
+    total = next((c for c in df.columns if c.startswith("totalifc")), None)  # Total IFC investment ...
+    if total is None:
+        raise SystemExit(f"[fatal] {path}: no 'Total IFC investment' column")
+    df["projectnumber"] = _num(df["projectnumber"])
+    df["totalifc"] = _num(df[total])
+    # MM/DD/YYYY, possibly with a time after it
+    df["year"] = _num(df["datedisclosed"].str.split(" ").str[0].str.split("/").str[2].fillna(""))
+    df["industry"] = df["industry"].replace("Telecommunications & Technology", "Telecomms & tech")
+    return df
+
+def load_amounts(paths: List[str]) -> "pd.DataFrame":
+    """Extractor CSVs, earlier files winning for projects in more than one; amounts in $m."""
+    parts = []
+    for path in paths:
+        df = _read(path)
+        parts.append(pd.DataFrame({
+            "projectnumber": _num(df["project_id"]),
+            "fetch_status": df["fetch_status"],
+            "web_usd": _num(df["ifc_investment_usd"]) / 1e6,
+            "web_note": df["ifc_investment_note"],
+            "web_usd2": _num(df["facility_notional_usd"]) / 1e6,
+            "web_note2": df["facility_note"],
+            "web_amount_mentions": df["all_amount_mentions"],
+            "web_text": df["section_text"],
+        }))
+    df = pd.concat(parts, ignore_index=True)
+    df = df[df["web_usd"].notna() | df["web_usd2"].notna()]
+    return df.drop_duplicates("projectnumber")
+
+def load_exports(path: str) -> "pd.DataFrame":
+    df = _read(path)
+    return pd.DataFrame({
+        "projectnumber": _num(df["project_id"]),
+        "export_hits": _num(df["export_hits"]),
+        "export_sentences": df["export_sentences"],
+    }).drop_duplicates("projectnumber")
+
+def load_countries(path: str) -> "pd.DataFrame":
+    df = _read(path)
+    df.columns = [stata_name(c) for c in df.columns]
+    for c in ("wbcountrycode", "year", "incomelevel"):
+        if c not in df.columns:
+            raise SystemExit(f"[fatal] {path}: no {c} column")
+    df["year"] = _num(df["year"])
+    return df[["wbcountrycode", "year", "incomelevel"]].drop_duplicates(["wbcountrycode", "year"])
+
+# --------------------------
+# Cleaning
+# --------------------------
+def clean_projects(projects: "pd.DataFrame", amounts: "pd.DataFrame",
+                   exports: Optional["pd.DataFrame"]) -> "pd.DataFrame":
+    """ifc_clean: y is the cleaned amount, ynotrad the same without trade finance ($m)."""
+    df = projects.merge(amounts, on="projectnumber", how="outer")
+    pid = df["projectnumber"]
+    # largest scraped value, unless the database total is smaller (missing values are ignored)
+    df["web_y"] = df[["web_usd", "web_usd2"]].max(axis=1)
+    df["y"] = df[["totalifc", "web_y"]].min(axis=1)
+    for p, v in OVERRIDES.items():
+        df.loc[pid == p, "y"] = v
+    keep_total = pid.isin(DATABASE_TOTAL_IDS)
+    df.loc[keep_total, "y"] = df.loc[keep_total, "totalifc"]
+
+    name = df["projectname"].fillna("")
+    trade = pid.isin(TRADE_FINANCE_IDS)
+    for term in TRADE_FINANCE_TERMS:
+        trade |= name.str.contains(term, regex=False)
+    df["tradefinance"] = trade.astype(int)
+    df["ynotrad"] = df["y"].where(~trade)
+    df["totalnotrad"] = df["totalifc"].where(~trade)
+    # the web has a number but the database lists none
+    df.loc[df["totalifc"].isna(), ["y", "ynotrad"]] = float("nan")
+
+    if exports is not None:
+        df = df.merge(exports, on="projectnumber", how="outer")
+        df.loc[df["projectnumber"].isin(NO_EXPORT_IDS), "export_hits"] = 0
+    else:
+        df["export_hits"] = float("nan")
+    return df
+
+def modal_income(clean: "pd.DataFrame", countries: "pd.DataFrame") -> "pd.Series":
+    """
+    Each country's most common income level over its projects and its
+    project-less years, like egen mode() over the merged data: a tie gives none.
+    """
+    n = clean.groupby(["wbcountrycode", "year"]).size().rename("n").reset_index()
+    cy = countries.merge(n, on=["wbcountrycode", "year"], how="left")
+    cy["n"] = cy["n"].fillna(1)
+    counts = cy[cy["incomelevel"] != ""].groupby(["wbcountrycode", "incomelevel"])["n"].sum().reset_index()
+    top = counts.groupby("wbcountrycode")["n"].transform("max")
+    best = counts[counts["n"] == top]
+    best = best[~best.duplicated("wbcountrycode", keep=False)]
+    return best.set_index("wbcountrycode")["incomelevel"]
+
+# --------------------------
+# Tables
+# --------------------------
+def build_tables(clean: "pd.DataFrame", countries: Optional["pd.DataFrame"] = None) -> Dict[str, "pd.DataFrame"]:
+    tables = {"ifc_clean": clean}
+
+    # Exporting graph: project level, $bn, years after 1995
+    df = clean.copy()
+    df["wbcountrycode"] = df["wbcountrycode"].replace({"ZR": "CD", "RY": "YE"})
+    if countries is not None:
+        df["incomelevel"] = df["wbcountrycode"].map(modal_income(df, countries))
+        df = df[df["incomelevel"].notna()]
+    df = df[df["year"] > 1995]
+    y = df["ynotrad"] / 1000
+    manuf = df["industry"] == "Manufacturing"
+    exporter = df["export_hits"] > 0  # NaN (not scanned) counts as no mentions
+    df = df.assign(y0=y.where(~manuf), y1=y.where(manuf & ~exporter), y2=y.where(manuf & exporter),
+                   y_export=y.where(exporter), y_noexport=y.where(~exporter))
+    tables["exports"] = df.groupby("year")[["y2", "y1", "y0"]].sum().reset_index()
+    tables["exports_by_industry"] = (df[df["industry"].fillna("") != ""]
+                                     .groupby(["year", "industry"])[["y_export", "y_noexport"]].sum().reset_index())
+
+    if countries is not None:
+        # Country-sector data: $m, the income level of each project's own year
+        cs = clean[clean["year"].notna()].copy()
+        cs["wbcountrycode"] = cs["wbcountrycode"].replace({"ZR": "CD"})
+        cs = cs.merge(countries, on=["wbcountrycode", "year"], how="left")
+        cs = cs[cs["incomelevel"].isin(INCOME_LEVELS)]
+
+        inc = cs[cs["year"] > 1995].pivot_table(index="year", columns="incomelevel", values="ynotrad",
+                                                 aggfunc="sum", fill_value=0)
+        inc = inc.reindex(columns=INCOME_LEVELS, fill_value=0.0).add_prefix("y_")
+        total = inc.sum(axis=1)
+        for c in list(inc.columns):
+            inc["share" + c] = 100 * inc[c] / total
+        tables["income_by_year"] = inc.reset_index()
+
+        lo, hi = HEATMAP_YEARS
+        hm = cs[cs["year"].between(lo, hi) & (cs["industry"].fillna("") != "")].copy()
+        hm["industry"] = hm["industry"].str.title()
+        hm = hm.pivot_table(index="industry", columns="incomelevel", values="ynotrad", aggfunc="sum")
+        tables["industry_heatmap"] = hm.reindex(columns=INCOME_LEVELS).add_prefix("y").reset_index()
+    return tables
+
+def write_tables(tables: Dict[str, "pd.DataFrame"], outdir: str) -> List[str]:
+    os.makedirs(outdir, exist_ok=True)
+    paths = []
+    for name, df in tables.items():
+        path = os.path.join(outdir, name + ".csv")
+        df = df.copy()
+        for c in ("year", "projectnumber"):
+            if c in df.columns:
+                df[c] = df[c].astype("Int64")
+        df.to_csv(path + ".tmp", index=False, float_format="%.3f" if name.startswith("exports") else None)
+        os.replace(path + ".tmp", path)
+        paths.append(path)
+    return paths
+
+def aggregate(projects: str, amounts: List[str], exports: Optional[str], outdir: str,
+              countries: Optional[str] = None) -> List[str]:
+    """Read the inputs, build every table, write them to outdir; returns the paths written."""
+    need_pandas()
+    clean = clean_projects(load_projects(projects), load_amounts(amounts),
+                           load_exports(exports) if exports else None)
+    return write_tables(build_tables(clean, load_countries(countries) if countries else None), outdir)
+
+def add_aggregate_args(ap) -> None:
+    ap.add_argument("--aggregate-dir", default="", metavar="DIR",
+                    help="after the run, write the chart tables (ifc_aggregate.py) here from --input and the outputs")
+    ap.add_argument("--countries", default="", help="CSV of wbcountrycode, year, incomelevel for the income tables")
+
+def main():
+    ap = argparse.ArgumentParser(description="Clean scraped IFC dollar values and build the chart tables")
+    ap.add_argument("--projects", required=True, help="IFC investment services project list (CSV)")
+    ap.add_argument("--amounts", nargs="+", required=True,
+                    help="dollar-value extractor output(s); earlier files win for duplicated projects")
+    ap.add_argument("--exports", default="", help="export scanner output")
+    ap.add_argument("--countries", default="", help="CSV of wbcountrycode, year, incomelevel")
+    ap.add_argument("--outdir", required=True)
+    args = ap.parse_args()
+    for path in aggregate(args.projects, args.amounts, args.exports, args.outdir, args.countries):
+        print(f"[done] wrote: {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Library entry points: run either extractor from your own code, without
+argparse, CSV files or a new interpreter per batch.
+
+  from ifc_batch import extract_amounts, find_exports
+
+  for row in extract_amounts(urls, workers=8):        # RowOut, in input order
+      store(row)
+
+  async for row in afind_exports(urls, session=shared, workers=8):  # OutRow
+      await store(row)
+
+`projects` is an iterable of project URLs, or of (url, name) pairs; it is
+read lazily, so it can be a stream. Rows come back in input order as soon
+as each is ready. A project that fails becomes an error row (fetch_status
+"error:...") instead of stopping the batch.
+
+`session` is anything with requests.Session.get, so pass your own
+connection pool, or a ThrottledSession / CachingSession from this repo
+for rate limiting and caching. At most `workers` projects run at a time
+and at most `per_host` requests are open to one host. Without a session,
+one is made for the batch and closed at the end; it is paced like the
+scripts' (`rate` req/s to start, adapted to 429/5xx) and retries each
+request up to `attempts` times.
+
+Text backend, sibling mode, taxonomy and memo are the module settings
+(set_backend, configure_sibling, ...), defaulting as in the scripts.
+"""
+
+import asyncio
+from typing import AsyncIterator, Callable, Iterable, Iterator, Optional, Tuple, Union
+
+import ifc_disclosures_api_extractor_v4 as amounts_mod
+import ifc_find_exports_v1 as exports_mod
+from ifc_common import HostCappedSession, make_session, run_ordered
+from ifc_ratelimit import AdaptiveRateLimiter, ThrottledSession
+
+Project = Union[str, Tuple[str, str]]
+
+def _pairs(projects: Iterable[Project]) -> Iterator[Tuple[str, str]]:
+    for p in projects:
+        yield (p, "") if isinstance(p, str) else (p[0], p[1])
+
+def _run(fetch: Callable, error: Callable, projects: Iterable[Project], session, workers: int,
+         per_host: int, rate: float, attempts: int) -> Iterator:
+    own = session is None
+    base = make_session(workers) if own else session
+    capped = HostCappedSession(base, per_host)
+    if own:  # a caller's session brings its own pacing and retries
+        limiter = AdaptiveRateLimiter(rate=rate, max_rate=max(rate, 10.0), burst=max(1.0, rate))
+        capped = ThrottledSession(capped, limiter, max_attempts=attempts)
+
+    def work(p: Tuple[str, str]):
+        url, name = p
+        try:
+            return fetch(capped, url, name)
+        except Exception as e:
+            return error(url, name, e)
+
+    try:
+        yield from run_ordered(work, _pairs(projects), max(1, workers))
+    finally:
+        if own:
+            base.close()
+
+def extract_amounts(projects: Iterable[Project], session=None, workers: int = 4, per_host: int = 4,
+                    rate: float = 4.0, attempts: int = 4) -> Iterator["amounts_mod.RowOut"]:
+    """Dollar-value extractor rows (RowOut), one per project."""
+    return _run(amounts_mod.fetch_one, amounts_mod.error_row, projects, session, workers, per_host, rate, attempts)
+
+def find_exports(projects: Iterable[Project], session=None, workers: int = 4, per_host: int = 4,
+                 rate: float = 4.0, attempts: int = 4) -> Iterator["exports_mod.OutRow"]:
+    """Export scanner rows (OutRow), one per project."""
+    return _run(exports_mod.fetch_one, exports_mod.error_row, projects, session, workers, per_host, rate, attempts)
+
+async def _stream(rows: Iterator) -> AsyncIterator:
+    """
+    Drive a blocking row iterator from the event loop, one next() at a time
+    on the loop's executor. Workers stay busy while the caller awaits, and
+    stop taking new projects when the caller stops reading.
+    """
+    loop = asyncio.get_running_loop()
+    done = object()
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            pending = loop.run_in_executor(None, next, rows, done)
+            row = await pending
+            if row is done:
+                return
+            yield row
+    finally:
+        if pending is not None and not pending.done():
+            await asyncio.wait([pending])  # the generator cannot be closed while it is running
+        await loop.run_in_executor(None, rows.close)
+
+def aextract_amounts(projects: Iterable[Project], session=None, workers: int = 4, per_host: int = 4,
+                     rate: float = 4.0, attempts: int = 4) -> AsyncIterator["amounts_mod.RowOut"]:
+    """extract_amounts as an async iterator."""
+    return _stream(extract_amounts(projects, session, workers, per_host, rate, attempts))
+
+def afind_exports(projects: Iterable[Project], session=None, workers: int = 4, per_host: int = 4,
+                  rate: float = 4.0, attempts: int = 4) -> AsyncIterator["exports_mod.OutRow"]:
+    """find_exports as an async iterator."""
+    return _stream(find_exports(projects, session, workers, per_host, rate, attempts))
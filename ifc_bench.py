@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the IFC disclosure scrapers.
+
+Starts a local HTTP stand-in for disclosuresservice.ifc.org (and the PDF
+hosts) that serves SPI/SII JSON and PDF fixtures with configurable latency
+and error rates, points the scrapers at it through IFC_API_BASE, and
+reports:
+
+  fetch_one  in-process, serial: projects/s, p50/p99 per-project latency
+             and a cProfile CPU split (parse / regex / pdf / network / other)
+             for the amount extractor and the export scanner
+  main       each script's main() as a subprocess on the same fixtures:
+             wall time, projects/s and peak RSS
+
+Fixtures are synthetic (seeded, --projects N) or recorded: --record-from
+CACHE_DIR replays the ProjectAccess JSON and PDFs an earlier run stored in
+its --cache-dir.
+
+  python ifc_bench.py --projects 200 --latency-ms 20 --error-rate 0.02 --json bench.json
+  python ifc_bench.py --record-from cache/ --baseline bench.json   # flag >10% regressions
+"""
+
+import argparse, cProfile, csv, json, os, pstats, random, re, resource, subprocess, sys, tempfile, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urlsplit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REAL_API_BASE = "https://disclosuresservice.ifc.org/api"
+MOCK = "http://mock.invalid"  # fixtures refer to the stand-in by this; replaced with its address when served
+
+# --------------------------
+# Fixtures
+# --------------------------
+class Fixtures:
+    """Responses keyed by path+query on the stand-in, plus the project list they cover."""
+    def __init__(self):
+        self.responses: Dict[str, Tuple[int, bytes, str]] = {}
+        self.projects: List[Tuple[str, str]] = []  # (project id, SPI/SII)
+
+    def add(self, path: str, status: int, body: bytes, ctype: str = "application/json") -> None:
+        self.responses[path] = (status, body, ctype)
+
+def tiny_pdf(lines: List[str]) -> bytes:
+    """A one-page PDF with the given text lines (Helvetica), enough for pdfminer."""
+    def esc(s: str) -> str:
+        return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    stream = "BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(f"({esc(l)}) '" for l in lines) + " ET"
+    objs = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+    ]
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for i, body in enumerate(objs, 1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+FILLER = [
+    "The company operates plants in three provinces and employs about {n} people.",
+    "Sales grew by {n} percent last year, driven by domestic demand.",
+    "The sponsor has a track record in the sector and strong governance.",
+    "Exports account for {n}% of revenue, mainly to regional markets.",
+    "The project will upgrade equipment and improve energy efficiency.",
+    "IFC's loan of up to US${n} million will finance the expansion program.",
+    "The total project cost is estimated at ${n} million.",
+    "A working capital facility of USD {n} million is also proposed.",
+    "The client plans to export processed goods to Europe and Asia.",
+    "Environmental and social risks are limited and manageable.",
+]
+SECTION_TITLES = ["Project Description", "Project Overview", "Description of Company and Purpose of Project"]
+
+def _narrative(r: random.Random, sentences: int) -> str:
+    return " ".join(r.choice(FILLER).format(n=r.randint(2, 400)) for _ in range(sentences))
+
+def synthetic_fixtures(n: int, seed: int = 1, pdf_share: float = 0.2) -> Fixtures:
+    """
+    Seeded ProjectAccess payloads: most carry an HTML description section;
+    a `pdf_share` of them only link a PDF that holds the section.
+    """
+    r = random.Random(seed)
+    fx = Fixtures()
+    for i in range(n):
+        pid, doc_type = str(30000 + i), r.choice(["SPI", "SPI", "SII"])
+        fx.projects.append((pid, doc_type))
+        pdf_url = f"{MOCK}/docs/{pid}.pdf"
+        if r.random() < pdf_share:
+            body = f"<p>Disclosure documents are attached.</p><p>{_narrative(r, 2)}</p>"
+            lines = [f"Project Number: {pid}", r.choice(SECTION_TITLES)]
+            lines += [_narrative(r, 1) for _ in range(r.randint(8, 30))] + ["Location", "Some city"]
+            fx.add(f"/docs/{pid}.pdf", 200, tiny_pdf(lines), "application/pdf")
+        else:
+            body = (f"<h2>{r.choice(SECTION_TITLES)}</h2><p>Project Name: Proj {pid}. Region: X. "
+                    f"Sector: manufacturing.</p>" + "".join(f"<p>{_narrative(r, r.randint(2, 8))}</p>"
+                                                           for _ in range(r.randint(2, 12)))
+                    + f"<h2>Location</h2><p>{_narrative(r, 2)}</p>")
+        payload = {
+            "projectNumber": pid, "docType": doc_type, "projectName": f"Proj {pid}",
+            "sections": [{"title": "Overview", "body": body},
+                         {"title": "Sponsor", "body": f"<p>{_narrative(r, 3)}</p>"}],
+            "meta": {"status": "Active", "country": r.choice(["Kenya", "Peru", "Vietnam", "Egypt"])},
+            "documents": [pdf_url],
+        }
+        for dt in ("SPI", "SII"):
+            p = dict(payload, docType=dt)
+            fx.add(f"/api/ProjectAccess/{dt}Project?projectId={pid}", 200, json.dumps(p).encode())
+        fx.add(f"/api/ProjectAccess/validateProjectUrl?ProjectNumber={pid}&documentType=SPI", 200, b'{"isValid":true}')
+    fx.add("/api/searchprovider/landingPageDetails?isLanding=1", 200,
+           json.dumps({"items": ["IFC supports export growth across the region."]}).encode())
+    return fx
+
+_ABS_PDF = re.compile(rb"https?://([^/\"'\s\\]+)/([^\"'\s\\]*?\.pdf)", re.IGNORECASE)
+
+def recorded_fixtures(cache_dir: str, limit: int = 0) -> Fixtures:
+    """Replay ProjectAccess JSON (and the PDFs they link) stored by an earlier --cache-dir run."""
+    from ifc_cache import ResponseCache
+    cache = ResponseCache(cache_dir)
+    fx = Fixtures()
+    pat = re.compile(r"/ProjectAccess/(SPI|SII)Project\?projectId=(\w+)$")
+    for url in cache.urls(REAL_API_BASE + "/%"):
+        hit = cache.get(url, ignore_ttl=True)
+        if hit is None:
+            continue
+        body = hit.content.replace(REAL_API_BASE.encode(), (MOCK + "/api").encode())
+        body = _ABS_PDF.sub(lambda m: MOCK.encode() + b"/ext/" + m.group(1) + b"/" + m.group(2), body)
+        fx.add(url[len(REAL_API_BASE) - len("/api"):], hit.status_code, body,
+               hit.headers.get("Content-Type", "application/json"))
+        m = pat.search(url)
+        if m and (not limit or len(fx.projects) < limit):
+            fx.projects.append((m.group(2), m.group(1)))
+    for url in cache.urls("%.pdf"):
+        hit = cache.get(url, ignore_ttl=True)
+        if hit is not None:
+            p = urlsplit(url)
+            fx.add(f"/ext/{p.netloc}{p.path}", hit.status_code, hit.content, "application/pdf")
+    cache.close()
+    if not fx.projects:
+        raise SystemExit(f"[fatal] no ProjectAccess responses in {cache_dir}")
+    return fx
+
+# --------------------------
+# Stand-in server
+# --------------------------
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, fixtures: Fixtures, latency: float = 0.0, error_rate: float = 0.0, seed: int = 1):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.fixtures = fixtures
+        self.latency, self.error_rate = latency, error_rate
+        self.base = f"http://127.0.0.1:{self.server_address[1]}"
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = self.errors = 0
+
+    def roll(self) -> Tuple[float, bool]:
+        with self._lock:
+            self.requests += 1
+            delay = self.latency * self._rng.uniform(0.5, 1.5)
+            fail = self._rng.random() < self.error_rate
+            self.errors += fail
+        return delay, fail
+
+    def start(self) -> "MockServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real service
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def do_GET(self):
+        srv: MockServer = self.server
+        delay, fail = srv.roll()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            status, body, ctype = 503, b'{"error":"busy"}', "application/json"
+        else:
+            status, body, ctype = srv.fixtures.responses.get(self.path, (404, b"{}", "application/json"))
+            body = body.replace(MOCK.encode(), srv.base.encode())
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        if fail:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *a):
+        pass
+
+# --------------------------
+# Measurements
+# --------------------------
+def percentile(xs: List[float], q: float) -> float:
+    if not xs:
+        return 0.0
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+def cpu_category(filename: str, func: str) -> str:
+    f = filename.replace("\\", "/")
+    if "pdfminer" in f or func.startswith(("_pdf", "pdf_", "extract_from_pdf")):
+        return "pdf"
+    if any(k in f for k in ("/bs4/", "/lxml/", "/selectolax/", "ifc_text.py", "html/parser.py", "_markupbase")) \
+            or "lxml." in func or "selectolax" in func:
+        return "parse"
+    if "re.Pattern" in func or "_sre" in func or "/re/" in f or "sre_" in f:
+        return "regex"
+    if any(k in f for k in ("/requests/", "/urllib3/", "/http/", "socket.py", "ssl.py")) \
+            or "socket" in func or "time.sleep" in func or "acquire" in func:
+        return "network"
+    return "other"
+
+def cpu_split(prof: cProfile.Profile) -> Dict[str, float]:
+    """Self time per category, from a cProfile run."""
+    split = {k: 0.0 for k in ("parse", "regex", "pdf", "network", "other")}
+    for (filename, _, func), (_, _, tt, _, _) in pstats.Stats(prof).stats.items():
+        split[cpu_category(filename, func)] += tt
+    return split
+
+def peak_rss_mb(ru) -> float:
+    return ru.ru_maxrss / 1024  # KB on Linux
+
+def bench_fetch_one(server: MockServer, args) -> Dict[str, Any]:
+    import ifc_disclosures_api_extractor_v4 as amounts_mod
+    import ifc_find_exports_v1 as exports_mod
+    from ifc_common import HostCappedSession, make_session
+    from ifc_ratelimit import throttle_from_args
+
+    urls = [(f"https://disclosures.ifc.org/project-detail/{dt}/{pid}/bench-{pid}", f"Proj {pid}")
+            for pid, dt in server.fixtures.projects]
+    results = {}
+    for name, fn in (("amounts", amounts_mod.fetch_one), ("exports", exports_mod.fetch_one)):
+        with make_session(1) as s:
+            session = throttle_from_args(HostCappedSession(s, args.per_host), args)
+            lat, prof = [], cProfile.Profile()
+            t0 = time.perf_counter()
+            prof.enable()
+            for url, pname in urls:
+                t = time.perf_counter()
+                fn(session, url, pname)
+                lat.append(time.perf_counter() - t)
+            prof.disable()
+            wall = time.perf_counter() - t0
+        results[name] = {
+            "projects": len(urls), "wall_s": round(wall, 3),
+            "projects_per_s": round(len(urls) / wall, 2) if wall else 0.0,
+            "p50_ms": round(percentile(lat, 0.50) * 1000, 1), "p99_ms": round(percentile(lat, 0.99) * 1000, 1),
+            "cpu_s": {k: round(v, 3) for k, v in cpu_split(prof).items()},
+        }
+    results["peak_rss_mb"] = round(peak_rss_mb(resource.getrusage(resource.RUSAGE_SELF)), 1)
+    return results
+
+def bench_main(server: MockServer, args) -> Dict[str, Any]:
+    tmp = tempfile.mkdtemp(prefix="ifc_bench_")
+    inp = os.path.join(tmp, "projects.csv")
+    with open(inp, "w", newline="", encoding="utf-8") as fh:
+        w = csv.writer(fh)
+        w.writerow(["Project Number", "Project Name", "Project Url"])
+        for pid, dt in server.fixtures.projects:
+            w.writerow([pid, f"Proj {pid}", f"https://disclosures.ifc.org/project-detail/{dt}/{pid}/bench-{pid}"])
+    common = ["--input", inp, "--rate", str(args.rate), "--max-rate", str(args.rate)]
+    runs = {
+        "amounts": ["ifc_disclosures_api_extractor_v4.py", "--output", os.path.join(tmp, "amounts.csv"),
+                    "--workers", str(args.workers)],
+        "exports": ["ifc_find_exports_v1.py", "--output", os.path.join(tmp, "exports.csv")],
+        "pipeline": ["ifc_pipeline.py", "--out", "amounts=" + os.path.join(tmp, "p_amounts.csv"),
+                     "--out", "exports=" + os.path.join(tmp, "p_exports.csv"), "--workers", str(args.workers)],
+    }
+    env = dict(os.environ, IFC_API_BASE=server.base + "/api", PYTHONWARNINGS="ignore")
+    results = {}
+    n = len(server.fixtures.projects)
+    for name, argv in runs.items():
+        t0 = time.perf_counter()
+        p = subprocess.Popen([sys.executable, os.path.join(HERE, argv[0])] + argv[1:] + common,
+                             env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        _, status, ru = os.wait4(p.pid, 0)
+        wall = time.perf_counter() - t0
+        err = p.stderr.read().decode(errors="replace").strip()
+        p.stderr.close()
+        if status != 0:
+            print(f"[bench] {name} main() failed:\n{err[-2000:]}")
+        results[name] = {"projects": n, "wall_s": round(wall, 3),
+                         "projects_per_s": round(n / wall, 2) if wall else 0.0,
+                         "peak_rss_mb": round(peak_rss_mb(ru), 1), "ok": status == 0}
+    return results
+
+# --------------------------
+# Report
+# --------------------------
+def compare(now: Dict[str, Any], base: Dict[str, Any], threshold: float = 0.10) -> List[str]:
+    """Lines for every projects/s that dropped (or p50 that rose) by more than `threshold`."""
+    out = []
+    for mode in ("fetch_one", "main"):
+        for name, r in now.get(mode, {}).items():
+            b = base.get(mode, {}).get(name)
+            if not isinstance(r, dict) or not isinstance(b, dict):
+                continue
+            if b.get("projects_per_s") and r["projects_per_s"] < b["projects_per_s"] * (1 - threshold):
+                out.append(f"{mode}/{name}: {b['projects_per_s']} -> {r['projects_per_s']} projects/s")
+            if b.get("p50_ms") and r.get("p50_ms", 0) > b["p50_ms"] * (1 + threshold):
+                out.append(f"{mode}/{name}: p50 {b['p50_ms']} -> {r['p50_ms']} ms")
+    return out
+
+def print_report(res: Dict[str, Any]) -> None:
+    for name, r in res.get("fetch_one", {}).items():
+        if not isinstance(r, dict):
+            continue
+        cpu = " ".join(f"{k}={v:.2f}s" for k, v in r["cpu_s"].items())
+        print(f"[fetch_one] {name}: {r['projects_per_s']} projects/s  p50={r['p50_ms']}ms "
+              f"p99={r['p99_ms']}ms  cpu: {cpu}")
+    if "fetch_one" in res:
+        print(f"[fetch_one] peak RSS {res['fetch_one']['peak_rss_mb']} MB")
+    for name, r in res.get("main", {}).items():
+        print(f"[main] {name}: {r['projects_per_s']} projects/s  wall={r['wall_s']}s  "
+              f"peak RSS {r['peak_rss_mb']} MB{'' if r['ok'] else '  FAILED'}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the IFC scrapers against a local mock disclosure service")
+    ap.add_argument("--projects", type=int, default=200, help="synthetic projects to generate")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--pdf-share", type=float, default=0.2, help="share of synthetic projects whose section is in a PDF")
+    ap.add_argument("--record-from", default="", help="serve responses recorded in this --cache-dir instead")
+    ap.add_argument("--latency-ms", type=float, default=20.0, help="mean server latency per request")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered 503 (Retry-After: 0)")
+    ap.add_argument("--mode", choices=["fetch_one", "main", "both"], default="both")
+    ap.add_argument("--workers", type=int, default=4, help="--workers passed to the scripts in main mode")
+    ap.add_argument("--per-host", type=int, default=4)
+    ap.add_argument("--rate", type=float, default=1000.0, help="request rate cap (high: measure the code, not the limiter)")
+    ap.add_argument("--max-attempts", type=int, default=4)
+    ap.add_argument("--json", default="", help="write the results here")
+    ap.add_argument("--baseline", default="", help="earlier --json results; report >10%% regressions")
+    args = ap.parse_args()
+    args.max_rate = args.rate
+
+    fixtures = recorded_fixtures(args.record_from, args.projects) if args.record_from else \
+        synthetic_fixtures(args.projects, args.seed, args.pdf_share)
+    server = MockServer(fixtures, args.latency_ms / 1000, args.error_rate, args.seed).start()
+    # must be set before the scrapers are imported: their endpoint URLs are built at import
+    os.environ["IFC_API_BASE"] = server.base + "/api"
+    print(f"[bench] {len(fixtures.projects)} projects on {server.base} "
+          f"(latency {args.latency_ms}ms, error rate {args.error_rate})")
+
+    res: Dict[str, Any] = {"projects": len(fixtures.projects), "latency_ms": args.latency_ms,
+                           "error_rate": args.error_rate}
+    if args.mode in ("fetch_one", "both"):
+        res["fetch_one"] = bench_fetch_one(server, args)
+    if args.mode in ("main", "both"):
+        res["main"] = bench_main(server, args)
+    res["server"] = {"requests": server.requests, "errors": server.errors}
+    server.shutdown()
+
+    print_report(res)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(res, fh, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            regressions = compare(res, json.load(fh))
+        for line in regressions:
+            print(f"[regression] {line}")
+        if regressions:
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+On-disk response cache shared by the IFC disclosure scrapers.
+
+Bodies (API JSON, PDFs) are stored content-addressed under <root>/objects,
+named by the sha256 of their bytes, so identical documents served from
+several URLs are kept once. A small SQLite index maps each URL to its blob
+and tracks size and last access for LRU eviction and an optional TTL.
+
+Usage from a script:
+  cache = ResponseCache("cache/", max_bytes=2 * 1024**3, ttl=None)
+  session = CachingSession(requests.Session(), cache, offline=False)
+  r = session.get(url, timeout=30)   # same shape as a requests.Response
+
+Inspect or trim a cache:
+  python ifc_cache.py --cache-dir cache/ [--max-mb 500] [--purge-expired-hours 720]
+"""
+
+import argparse, hashlib, json, os, sqlite3, tempfile, threading, time
+from typing import Dict, List, Optional
+
+# Only definitive answers are worth replaying; 5xx/429 must be retried live.
+CACHEABLE_STATUS = {200, 404}
+
+class CacheMiss(Exception):
+    """Raised in offline mode when a URL has no cached response."""
+
+class CachedResponse:
+    """Minimal stand-in for requests.Response built from a cache entry."""
+    from_cache = True
+
+    def __init__(self, url: str, status_code: int, content: bytes, headers: Dict[str, str]):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+def _sha256(b: bytes) -> str:
+    return hashlib.sha256(b).hexdigest()
+
+class ResponseCache:
+    def __init__(self, root: str, max_bytes: int = 2 * 1024**3, ttl: Optional[float] = None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl = ttl  # seconds; None = never expires
+        self.hits = self.misses = self.stores = self.evictions = 0
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS entries (
+            url TEXT PRIMARY KEY, digest TEXT NOT NULL, status INTEGER NOT NULL,
+            headers TEXT NOT NULL, size INTEGER NOT NULL,
+            stored_at REAL NOT NULL, last_access REAL NOT NULL)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_access)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_digest ON entries(digest)")
+        self._db.commit()
+        self._total = self._stored_bytes()
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest[2:])
+
+    def get(self, url: str, ignore_ttl: bool = False) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest, status, headers, stored_at FROM entries WHERE url=?", (url,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            digest, status, headers, stored_at = row
+            if not ignore_ttl and self.ttl is not None and time.time() - stored_at > self.ttl:
+                self.misses += 1
+                return None
+            try:
+                with open(self._blob_path(digest), "rb") as fh:
+                    content = fh.read()
+            except OSError:
+                # blob removed underneath us; forget the entry
+                self._db.execute("DELETE FROM entries WHERE url=?", (url,))
+                self._db.commit()
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE entries SET last_access=? WHERE url=?", (time.time(), url))
+            self._db.commit()
+            self.hits += 1
+        return CachedResponse(url, status, content, json.loads(headers))
+
+    def put(self, url: str, status: int, content: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+        digest = _sha256(content)
+        path = self._blob_path(digest)
+        keep = {k: v for k, v in (headers or {}).items()
+                if k.lower() in ("content-type", "etag", "last-modified")}
+        with self._lock:
+            known = self._db.execute("SELECT 1 FROM entries WHERE digest=? LIMIT 1", (digest,)).fetchone()
+            if not known or not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+                with os.fdopen(fd, "wb") as fh:
+                    fh.write(content)
+                os.replace(tmp, path)  # atomic: readers never see a partial blob
+            if not known:
+                self._total += len(content)
+            old = self._db.execute("SELECT digest FROM entries WHERE url=?", (url,)).fetchone()
+            now = time.time()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?,?,?,?,?,?,?)",
+                (url, digest, status, json.dumps(keep), len(content), now, now),
+            )
+            if old and old[0] != digest:
+                self._drop_blob_if_unused(old[0])
+            self._db.commit()
+            self.stores += 1
+            self._evict_locked()
+
+    def _drop_blob_if_unused(self, digest: str) -> None:
+        if self._db.execute("SELECT 1 FROM entries WHERE digest=? LIMIT 1", (digest,)).fetchone():
+            return
+        path = self._blob_path(digest)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            self._total -= size
+        except OSError:
+            pass
+
+    def _stored_bytes(self) -> int:
+        # blobs shared by several URLs are counted once
+        row = self._db.execute(
+            "SELECT COALESCE(SUM(size),0) FROM (SELECT digest, MAX(size) AS size FROM entries GROUP BY digest)"
+        ).fetchone()
+        return int(row[0])
+
+    def total_bytes(self) -> int:
+        return self._total
+
+    def _evict_locked(self) -> None:
+        if self._total <= self.max_bytes:
+            return
+        for url, digest in self._db.execute(
+            "SELECT url, digest FROM entries ORDER BY last_access ASC"
+        ).fetchall():
+            self._db.execute("DELETE FROM entries WHERE url=?", (url,))
+            self._drop_blob_if_unused(digest)
+            self.evictions += 1
+            if self._total <= self.max_bytes:
+                break
+        self._db.commit()
+
+    def evict(self, max_bytes: Optional[int] = None) -> None:
+        with self._lock:
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._evict_locked()
+
+    def purge_expired(self, ttl: float) -> int:
+        cutoff = time.time() - ttl
+        with self._lock:
+            rows = self._db.execute("SELECT url, digest FROM entries WHERE stored_at < ?", (cutoff,)).fetchall()
+            for url, digest in rows:
+                self._db.execute("DELETE FROM entries WHERE url=?", (url,))
+                self._drop_blob_if_unused(digest)
+            self._db.commit()
+        return len(rows)
+
+    def urls(self, like: str = "%") -> List[str]:
+        """Cached URLs matching a SQL LIKE pattern."""
+        with self._lock:
+            return [r[0] for r in self._db.execute("SELECT url FROM entries WHERE url LIKE ? ORDER BY url", (like,))]
+
+    def stats(self) -> str:
+        n = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return (f"{n} urls, {self.total_bytes() / 1e6:.1f} MB; "
+                f"hits={self.hits} misses={self.misses} stored={self.stores} evicted={self.evictions}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+class CachingSession:
+    """
+    Wraps anything with a requests-style .get(). Cached URLs are answered
+    from disk; misses go to the wrapped session and are stored if the
+    status is cacheable. In offline mode a miss raises CacheMiss and the
+    network is never touched (and the TTL is ignored). URLs starting with
+    `bypass` skip the cache when online, e.g. API URLs that must reach a
+    ConditionalSession underneath (--state).
+    """
+    def __init__(self, session, cache: ResponseCache, offline: bool = False, bypass: Optional[str] = None):
+        self.session = session
+        self.cache = cache
+        self.offline = offline
+        self.bypass = bypass
+
+    def get(self, url: str, **kw):
+        if self.bypass and not self.offline and url.startswith(self.bypass):
+            return self.session.get(url, **kw)
+        hit = self.cache.get(url, ignore_ttl=self.offline)
+        if hit is not None:
+            return hit
+        if self.offline:
+            raise CacheMiss(url)
+        r = self.session.get(url, **kw)
+        if r.status_code in CACHEABLE_STATUS:
+            self.cache.put(url, r.status_code, r.content, dict(r.headers))
+        return r
+
+def add_cache_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--cache-dir", default="", help="directory for the on-disk response cache (off if empty)")
+    ap.add_argument("--cache-max-mb", type=float, default=2048, help="cache size limit; least recently used entries are evicted")
+    ap.add_argument("--cache-ttl-hours", type=float, default=0, help="refetch cached responses older than this (0 = never)")
+    ap.add_argument("--offline", action="store_true", help="answer every request from the cache; never touch the network")
+
+def cache_from_args(args) -> Optional[ResponseCache]:
+    if args.offline and not args.cache_dir:
+        raise SystemExit("[fatal] --offline needs --cache-dir")
+    if not args.cache_dir:
+        return None
+    ttl = args.cache_ttl_hours * 3600 if args.cache_ttl_hours > 0 else None
+    return ResponseCache(args.cache_dir, max_bytes=int(args.cache_max_mb * 1024**2), ttl=ttl)
+
+def main():
+    ap = argparse.ArgumentParser(description="Inspect or trim an IFC response cache")
+    ap.add_argument("--cache-dir", required=True)
+    ap.add_argument("--max-mb", type=float, default=0, help="evict LRU entries down to this size")
+    ap.add_argument("--purge-expired-hours", type=float, default=0, help="drop entries stored longer ago than this")
+    args = ap.parse_args()
+
+    cache = ResponseCache(args.cache_dir)
+    if args.purge_expired_hours > 0:
+        n = cache.purge_expired(args.purge_expired_hours * 3600)
+        print(f"[cache] purged {n} expired entries")
+    if args.max_mb > 0:
+        cache.evict(int(args.max_mb * 1024**2))
+    print(f"[cache] {cache.stats()}")
+    cache.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Resumable CSV output for long scraper runs.
+
+Every row is appended with a single write and fsync'd, then recorded in a
+sidecar journal (<output>.journal) as "<byte offset>\t<project_id>\t<url>".
+After a crash the output is truncated back to the last journaled offset,
+which drops any half-written row, and the journaled URLs are skipped.
+If there is no journal (e.g. an output from an older run) the completed
+URLs are read back from the output itself.
+
+Usage:
+  with CheckpointWriter(path, fieldnames, resume=args.resume) as out:
+      for r in rows:
+          if r.url in out.done: continue
+          out.writerow(asdict(fetch_one(...)))
+"""
+
+import csv, io, os
+from typing import Dict, List, Set
+
+class CheckpointWriter:
+    def __init__(self, path: str, fieldnames: List[str], resume: bool = False, key: str = "url"):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.fieldnames = fieldnames
+        self.key = key
+        self.done: Set[str] = set()
+        if resume and os.path.exists(path):
+            if os.path.exists(self.journal_path):
+                self._recover_from_journal()
+            else:
+                self._recover_from_output()
+        else:
+            self._start_fresh()
+        self._fh = open(path, "ab")
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self.resumed = len(self.done)
+
+    def _encode(self, row: Dict) -> bytes:
+        buf = io.StringIO()
+        csv.DictWriter(buf, fieldnames=self.fieldnames, extrasaction="ignore").writerow(row)
+        return buf.getvalue().encode("utf-8")
+
+    def _start_fresh(self) -> None:
+        buf = io.StringIO()
+        csv.DictWriter(buf, fieldnames=self.fieldnames).writeheader()
+        with open(self.path, "wb") as fh:
+            fh.write(buf.getvalue().encode("utf-8"))
+        with open(self.journal_path, "w", encoding="utf-8") as jf:
+            jf.write(f"{len(buf.getvalue().encode('utf-8'))}\t\t\n")
+
+    def _recover_from_journal(self) -> None:
+        last = 0
+        with open(self.journal_path, encoding="utf-8") as jf:
+            for line in jf:
+                if not line.endswith("\n"):
+                    break  # torn journal line: that row is redone
+                parts = line.rstrip("\n").split("\t")
+                last = int(parts[0])
+                if len(parts) > 2 and parts[2]:
+                    self.done.add(parts[2])
+        with open(self.path, "r+b") as fh:
+            fh.truncate(last)
+
+    def _recover_from_output(self) -> None:
+        # No journal: keep only rows that parse completely, rewrite atomically.
+        with open(self.path, encoding="utf-8", newline="") as fh:
+            data = fh.read()
+        rows = list(csv.DictReader(io.StringIO(data)))
+        if rows and not data.endswith("\n"):
+            rows.pop()  # last row was cut off mid-write
+        rows = [r for r in rows if None not in r and all(v is not None for v in r.values())]
+        tmp = self.path + ".tmp"
+        offsets = []
+        with open(tmp, "wb") as out:
+            buf = io.StringIO()
+            csv.DictWriter(buf, fieldnames=self.fieldnames).writeheader()
+            out.write(buf.getvalue().encode("utf-8"))
+            offsets.append((out.tell(), "", ""))
+            for r in rows:
+                out.write(self._encode(r))
+                offsets.append((out.tell(), r.get("project_id", ""), r.get(self.key, "")))
+                self.done.add(r.get(self.key, ""))
+        os.replace(tmp, self.path)
+        with open(self.journal_path, "w", encoding="utf-8") as jf:
+            for off, pid, url in offsets:
+                jf.write(f"{off}\t{pid}\t{url}\n")
+
+    def writerow(self, row: Dict) -> None:
+        self._fh.write(self._encode(row))
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._journal.write(f"{self._fh.tell()}\t{row.get('project_id') or ''}\t{row.get(self.key) or ''}\n")
+        self._journal.flush()
+        self.done.add(row.get(self.key) or "")
+
+    def close(self, completed: bool = True) -> None:
+        self._fh.close()
+        self._journal.close()
+        if completed:
+            # a finished output is its own record; --resume reads it back if needed
+            os.remove(self.journal_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(completed=exc_type is None)
+        return False
+
+def add_resume_args(ap) -> None:
+    ap.add_argument("--resume", action="store_true",
+                    help="skip projects already in --output (per its .journal sidecar) and append the rest")
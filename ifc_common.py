@@ -0,0 +1,173 @@
+"""
+Helpers shared by the IFC disclosure scrapers and the combined pipeline:
+URL parsing, JSON string walking, whitespace cleanup, API endpoint URLs,
+and the HTTP session / concurrency plumbing.
+"""
+
+import contextvars, csv, os, re, threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+# Overridable so the scrapers can be pointed at a local stand-in (ifc_bench.py)
+API_BASE = os.environ.get("IFC_API_BASE", "https://disclosuresservice.ifc.org/api").rstrip("/")
+
+def project_api_url(doc_type: str, pid: str) -> str:
+    """ProjectAccess endpoint for one disclosure (doc_type is SPI or SII)."""
+    return f"{API_BASE}/ProjectAccess/{doc_type}Project?projectId={pid}"
+
+# --------------------------
+# Text & JSON utils
+# --------------------------
+def normalize_ws(s: str) -> str:
+    return re.sub(r"[ \t]+", " ", (s or "").replace("\xa0", " ")).strip()
+
+def walk_strings(obj: Any, out: List[str]) -> None:
+    """Collect all string leaves from nested JSON."""
+    if isinstance(obj, str):
+        out.append(obj)
+    elif isinstance(obj, list):
+        for it in obj:
+            walk_strings(it, out)
+    elif isinstance(obj, dict):
+        for v in obj.values():
+            walk_strings(v, out)
+
+def parse_id_and_type(url: str) -> Tuple[Optional[str], Optional[str]]:
+    """Extract projectId and doc type (SPI/SII) from a disclosure URL."""
+    try:
+        p = urlparse(url)
+        parts = [x for x in p.path.split("/") if x]
+        for i, seg in enumerate(parts):
+            if seg == "project-detail" and i + 2 < len(parts):
+                doc_type = parts[i + 1].upper()  # SPI or SII
+                proj_id = parts[i + 2]
+                proj_id = re.sub(r"^0+", "", proj_id) or proj_id
+                return proj_id, doc_type
+    except Exception:
+        pass
+    return None, None
+
+# --------------------------
+# Input
+# --------------------------
+SNIFF_BYTES = 64 * 1024
+
+def open_input_rows(path: str, url_col: str, name_col: str, max_rows: int = 0,
+                    warn: bool = True) -> Iterator[Tuple[str, str]]:
+    """
+    Stream (url, name) pairs from a CSV/TSV without loading it. The
+    delimiter is sniffed from the first 64KB and only the two columns are
+    kept. The header is checked before this returns, so a bad --url-col
+    fails fast.
+    """
+    fh = open(path, newline="", encoding="utf-8-sig")
+    sample = fh.read(SNIFF_BYTES)
+    fh.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",\t;|")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(fh, dialect)
+    header = [h.strip() for h in next(reader, [])]
+    if url_col not in header:
+        fh.close()
+        raise SystemExit(f"[fatal] URL column not found: {url_col}\nAvailable: {header}")
+    ui = header.index(url_col)
+    ni = header.index(name_col) if name_col in header else None
+    if ni is None and warn:
+        print(f"[warn] name column '{name_col}' not found; using empty names.")
+
+    def rows() -> Iterator[Tuple[str, str]]:
+        with fh:
+            records = (rec for rec in reader if any(f.strip() for f in rec))  # skip blank lines
+            for rec in islice(records, max_rows if max_rows and max_rows > 0 else None):
+                url = rec[ui].strip() if ui < len(rec) else ""
+                name = rec[ni] if ni is not None and ni < len(rec) else ""
+                yield url, name
+    return rows()
+
+# --------------------------
+# Sessions & concurrency
+# --------------------------
+def make_session(workers: int = 1) -> requests.Session:
+    s = requests.Session()
+    s.headers.update({
+        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X) IFC-Export-Scanner/1.0",
+        "Accept": "application/json, text/plain, */*",
+        "Connection": "keep-alive",
+    })
+    # one pooled connection per worker so threads don't queue on the adapter
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=max(10, workers))
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+class HostCappedSession:
+    """
+    Wraps a requests.Session so that at most `per_host` requests are in
+    flight to any one host, however many worker threads share it.
+    """
+    def __init__(self, session: requests.Session, per_host: int = 4):
+        self.session = session
+        self.per_host = max(1, per_host)
+        self._lock = threading.Lock()
+        self._sems: Dict[str, threading.BoundedSemaphore] = {}
+
+    def _sem(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._sems:
+                self._sems[host] = threading.BoundedSemaphore(self.per_host)
+            return self._sems[host]
+
+    def get(self, url: str, **kw):
+        with self._sem(url):
+            return self.session.get(url, **kw)
+
+def run_ordered(fn: Callable[[Any], Any], items: Iterable[Any], workers: int = 1) -> Iterator[Any]:
+    """
+    Yield fn(item) for each item, in input order, with up to `workers`
+    calls running concurrently. Results are yielded as soon as every
+    earlier item has finished, so callers can stream them to disk.
+    """
+    if workers <= 1:
+        for item in items:
+            yield fn(item)
+        return
+    it = iter(items)
+    window = workers * 2  # keep the pool busy without reading the whole input ahead
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        pending = deque()
+        for item in it:
+            pending.append(ex.submit(fn, item))
+            if len(pending) >= window:
+                break
+        while pending:
+            res = pending.popleft().result()
+            for item in it:
+                pending.append(ex.submit(fn, item))
+                break
+            yield res
+
+def fan_out(fn: Callable[[Any], Any], items: Iterable[Any]) -> List[Any]:
+    """
+    fn(item) for all items at once, results in order: the first runs on
+    the calling thread, the rest on short-lived threads that see the
+    caller's context variables. For a project's few independent requests.
+    """
+    items = list(items)
+    if len(items) <= 1:
+        return [fn(it) for it in items]
+    with ThreadPoolExecutor(max_workers=len(items) - 1) as ex:
+        rest = [ex.submit(contextvars.copy_context().run, fn, it) for it in items[1:]]
+        first = fn(items[0])
+        return [first] + [f.result() for f in rest]
+
+def add_concurrency_args(ap) -> None:
+    ap.add_argument("--workers", type=int, default=1, help="projects fetched concurrently (1 = serial)")
+    ap.add_argument("--per-host", type=int, default=4, help="max concurrent requests to any one host")
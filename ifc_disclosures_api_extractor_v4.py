@@ -1,13 +1,36 @@
 #!/usr/bin/env python3
-import argparse, csv, io, re, json
+import argparse, io, re, json, signal, threading, time
+import html as html_lib
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass, asdict
-from typing import Any, List, Tuple, Optional
-from urllib.parse import urlparse
+from typing import Any, Iterable, List, Tuple, Optional
 
-import pandas as pd
 import requests
-from bs4 import BeautifulSoup
-from pdfminer.high_level import extract_text as pdf_extract_text
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+
+try:
+    import resource  # POSIX only; memory caps are skipped elsewhere
+except ImportError:
+    resource = None
+
+from ifc_cache import CachingSession, add_cache_args, cache_from_args
+from ifc_checkpoint import CheckpointWriter, add_resume_args
+from ifc_memo import add_memo_args, configure_memo, memoized
+from ifc_metrics import METRIC_COLUMNS, MeteredSession, add_metrics_args, count, metrics_from_args, stage
+from ifc_parquet import add_parquet_args, parquet_from_args
+from ifc_ratelimit import add_rate_args, throttle_from_args
+from ifc_shard import add_shard_args, shard_from_args, shard_rows
+from ifc_state import ConditionalSession, add_state_args, run_incremental, state_from_args
+from ifc_text import add_text_args, backend, html_text, parse_html, set_backend
+from ifc_common import (API_BASE, HostCappedSession, add_concurrency_args, fan_out, make_session,
+                        normalize_ws, open_input_rows, parse_id_and_type, project_api_url, run_ordered,
+                        walk_strings)
 
 # --------------------------
 # Section heading heuristics
@@ -80,24 +103,37 @@ IFC_ANCHORS = [
     'ifc loan','ifc equity','ifc guarantee','with ifc investment of','ifc participation','ifc commit'
 ]
 FACILITY_TERMS = ['facility','portfolio','program','ceiling','envelope','guarantee capacity','up to']
+IFC_COMMIT_KEYWORDS = ['invest','loan','equity','guarantee','provide','lend','commit']
 SENT_SPLIT = re.compile(r'(?<=[\.\?\!])\s+')
 
+AMOUNT_RES = [re.compile(p, re.IGNORECASE) for p in AMOUNT_REGEXES]
+IFC_COMMIT_RES = [re.compile(p, re.IGNORECASE) for p in IFC_COMMIT_PATTERNS]
+
 # --------------------------
 # Text utils
 # --------------------------
-def normalize_ws(s: str) -> str:
-    return re.sub(r"[ \t]+", " ", (s or "").replace("\xa0"," ")).strip()
-
 def html_to_text(html: str) -> str:
-    soup = BeautifulSoup(html or "", "lxml")
-    return soup.get_text("\n", strip=True)
+    return html_text(html or "")
 
 def slice_section_from_html_block(html: str) -> Tuple[str, str]:
     """
     Parse HTML, find a heading whose text matches one of DESC_TITLES,
     then collect following siblings until the next heading.
     """
-    soup = BeautifulSoup(html or "", "lxml")
+    soup = parse_html(html or "")
+    found = section_after_heading_tag(soup)
+    if found is None:
+        # fall back to plain-text slice
+        txt = soup.get_text("\n", strip=True)
+        sec, title = slice_section(txt)
+        return sec, title
+    return found
+
+def section_after_heading_tag(soup) -> Optional[Tuple[str, str]]:
+    """
+    The heading-anchored half of slice_section_from_html_block; None if no
+    heading matched. `soup` is a bs4 soup or an ifc_text tree.
+    """
     candidates = soup.find_all(["h1","h2","h3","h4","h5","h6","strong","b"])
     def norm(s): return re.sub(r"[ \t]+"," ", (s or "").strip()).lower()
     anchor = None
@@ -109,10 +145,7 @@ def slice_section_from_html_block(html: str) -> Tuple[str, str]:
             matched = t
             break
     if not anchor:
-        # fall back to plain-text slice
-        txt = soup.get_text("\n", strip=True)
-        sec, title = slice_section(txt)
-        return sec, title
+        return None
 
     out = []
     for sib in anchor.next_siblings:
@@ -131,6 +164,22 @@ def slice_section_from_html_block(html: str) -> Tuple[str, str]:
     section = normalize_ws("\n".join(out).strip())
     return (section, matched) if section else ("","")
 
+def first_cue_stop(low: str, pos: int, floor: int = 400) -> int:
+    """
+    Offset from `pos` where slice_section stops: the nearest cue whose
+    first occurrence after `pos` lies more than `floor` chars in (a cue
+    first seen within the floor never stops it); -1 if there is none.
+    Once a stop is known, later cues are only searched up to it, so the
+    cost follows the section length rather than the rest of the document.
+    """
+    best = -1
+    for cue in NEXT_CUES:
+        end = len(low) if best == -1 else pos + best + len(cue) - 1
+        j = low.find(cue, pos, end)
+        if j != -1 and j - pos > floor:
+            best = j - pos
+    return best
+
 def slice_section(full_text: str) -> Tuple[str, str]:
     """
     Softer text fallback: start after a known heading; only stop at cues
@@ -138,11 +187,26 @@ def slice_section(full_text: str) -> Tuple[str, str]:
     """
     t = full_text or ""
     low = t.lower()
+    if len(low) != len(t):
+        return _slice_section_by_find(t, low)  # lower() moved offsets; keep the original arithmetic
     for key in DESC_TITLES:
         start = low.find(key)
         if start == -1:
             continue
         # body after heading line
+        nl = t.find("\n", start)
+        cand = start if nl == -1 else nl + 1
+        end = first_cue_stop(low, cand)
+        chunk = normalize_ws((t[cand:] if end == -1 else t[cand:cand + end]).strip())
+        if chunk:
+            return chunk, key
+    return "", ""
+
+def _slice_section_by_find(t: str, low: str) -> Tuple[str, str]:
+    for key in DESC_TITLES:
+        start = low.find(key)
+        if start == -1:
+            continue
         body = t[start:].split("\n", 1)
         candidate = body[1] if len(body) > 1 else body[0]
         end = len(candidate)
@@ -172,130 +236,439 @@ def _normalize_amount(num_str: str, unit: Optional[str]) -> Optional[float]:
     mult = UNIT_MULT.get(unit, 1.0)
     return base * mult
 
-def find_amounts(text: str) -> List[dict]:
+def _scan_amounts(text: str) -> List[Tuple[int, int, str, float]]:
+    """Every amount match as (pattern index, start, raw, amount), before dedupe."""
     hits = []
-    for pat in AMOUNT_REGEXES:
-        for m in re.finditer(pat, text, flags=re.IGNORECASE):
+    for k, pat in enumerate(AMOUNT_RES):
+        for m in pat.finditer(text):
             num = m.group(1)
             unit = m.group(2) if m.lastindex and m.lastindex >= 2 else None
             val = _normalize_amount(num, unit)
             if val:
-                hits.append({'raw': m.group(0), 'amount': val})
-    # dedupe by raw
+                hits.append((k, m.start(), m.group(0), val))
+    return hits
+
+def _dedupe_raw(hits: Iterable[Tuple[int, int, str, float]]) -> List[dict]:
     seen, out = set(), []
-    for h in hits:
-        if h['raw'] in seen: continue
-        seen.add(h['raw']); out.append(h)
+    for _, _, raw, val in hits:
+        if raw in seen: continue
+        seen.add(raw); out.append({'raw': raw, 'amount': val})
     return out
 
+def find_amounts(text: str) -> List[dict]:
+    return _dedupe_raw(_scan_amounts(text))
+
+class Sentence:
+    __slots__ = ("text", "offset", "hits", "amounts", "has_ifc", "ifc_commit", "facility")
+
+    def __init__(self, text: str, offset: int):
+        self.text = text
+        self.offset = offset
+        self.hits = _scan_amounts(text)
+        self.amounts = _dedupe_raw(self.hits)  # == find_amounts(text)
+        low = text.lower()
+        self.has_ifc = 'ifc' in low
+        self.ifc_commit = self.has_ifc and any(k in low for k in IFC_COMMIT_KEYWORDS)
+        self.facility = any(term in low for term in FACILITY_TERMS)
+
+class AmountIndex:
+    """
+    One pass over a corpus: sentences are split once, every amount is
+    found once with the compiled AMOUNT_RES, and each sentence is tagged
+    with the IFC-anchor, commit-phrase and facility-term flags. The three
+    pickers below read from this index instead of re-scanning the text.
+    """
+    def __init__(self, text: str):
+        self.text = text
+        self.sentences: List[Sentence] = []
+        pos = 0
+        for m in SENT_SPLIT.finditer(text):
+            self.sentences.append(Sentence(text[pos:m.start()], pos))
+            pos = m.end()
+        self.sentences.append(Sentence(text[pos:], pos))
+
+    def with_context(self) -> List[dict]:
+        results = []
+        for sent in self.sentences:
+            if not sent.amounts: continue
+            ctx = normalize_ws(sent.text)[:300]
+            first = {}  # offset of the occurrence _dedupe_raw kept
+            for _, st, raw, _ in sent.hits:
+                first.setdefault(raw, sent.offset + st)
+            for hit in sent.amounts:
+                results.append({'raw': hit['raw'], 'amount_usd': hit['amount'], 'context': ctx,
+                                'offset': first[hit['raw']]})
+        return results
+
+    def whole_text_amounts(self) -> List[dict]:
+        # find_amounts(text): all pattern-0 matches in text order, then pattern 1.
+        # No match can span a sentence break, so the sentence hits are the same set.
+        hits = [(k, sent.offset + st, raw, val) for sent in self.sentences for k, st, raw, val in sent.hits]
+        hits.sort(key=lambda h: (h[0], h[1]))
+        return _dedupe_raw(hits)
+
+    def ifc_investment(self) -> Tuple[Optional[float], Optional[str]]:
+        text = self.text
+        # 1) Direct phrase-level matches (highest confidence)
+        for pat in IFC_COMMIT_RES:
+            for m in pat.finditer(text):
+                num, unit = m.group('num'), m.group('unit')
+                val = _normalize_amount(num, unit)
+                if val:
+                    start = max(0, m.start() - 140); end = min(len(text), m.end() + 140)
+                    ctx = normalize_ws(text[start:end])
+                    return val, f"direct phrase: {ctx}"
+        # 2) Sentence-level heuristic with IFC + invest/loan/equity/guarantee
+        candidates = []
+        for sent in self.sentences:
+            if sent.ifc_commit:
+                for a in sent.amounts:
+                    candidates.append((a['amount'], sent))
+        if candidates:
+            chosen = min(candidates, key=lambda x: x[0])
+            return chosen[0], f"ifc-sentence: {normalize_ws(chosen[1].text)}"
+        # 3) Small window around “IFC”
+        sents = self.sentences
+        for i, sent in enumerate(sents):
+            if sent.has_ifc:
+                near = sents[max(0, i-1):min(len(sents), i+2)]
+                amts = [a for s2 in near for a in s2.amounts]
+                if amts:
+                    chosen = min(amts, key=lambda x: x['amount'])
+                    window = " ".join(s2.text for s2 in near)
+                    return chosen['amount'], f"ifc-window: {normalize_ws(window)}"
+        return None, None
+
+    def facility_notional(self) -> Tuple[Optional[float], Optional[str]]:
+        cands = []
+        for sent in self.sentences:
+            if sent.facility:
+                for a in sent.amounts:
+                    cands.append((a['amount'], sent))
+        if cands:
+            chosen = max(cands, key=lambda x: x[0])
+            return chosen[0], f"facility sentence: {normalize_ws(chosen[1].text)}"
+        amts_all = self.whole_text_amounts()
+        if amts_all:
+            top = max(amts_all, key=lambda x: x['amount'])
+            return top['amount'], f"page max: {top['raw']}"
+        return None, None
+
+def amount_picks(text: str) -> Tuple[List[dict], Tuple[Optional[float], Optional[str]], Tuple[Optional[float], Optional[str]]]:
+    """(mentions with context, IFC investment pick, facility notional pick) for one corpus."""
+    amounts = AmountIndex(text)
+    return amounts.with_context(), amounts.ifc_investment(), amounts.facility_notional()
+
 def amounts_with_context(text: str) -> List[dict]:
-    results = []
-    sentences = SENT_SPLIT.split(text)
-    for sent in sentences:
-        a = find_amounts(sent)
-        for hit in a:
-            results.append({
-                'raw': hit['raw'],
-                'amount_usd': hit['amount'],
-                'context': normalize_ws(sent)[:300]
-            })
-    return results
+    return AmountIndex(text).with_context()
 
 def pick_ifc_investment(text: str) -> Tuple[Optional[float], Optional[str]]:
-    # 1) Direct phrase-level matches (highest confidence)
-    for pat in IFC_COMMIT_PATTERNS:
-        for m in re.finditer(pat, text, flags=re.IGNORECASE):
-            num, unit = m.group('num'), m.group('unit')
-            val = _normalize_amount(num, unit)
-            if val:
-                start = max(0, m.start() - 140); end = min(len(text), m.end() + 140)
-                ctx = normalize_ws(text[start:end])
-                return val, f"direct phrase: {ctx}"
-    # 2) Sentence-level heuristic with IFC + invest/loan/equity/guarantee
-    sentences = SENT_SPLIT.split(text)
-    candidates = []
-    for sent in sentences:
-        l = sent.lower()
-        if 'ifc' in l and any(k in l for k in ['invest','loan','equity','guarantee','provide','lend','commit']):
-            for a in find_amounts(sent):
-                candidates.append((a['amount'], normalize_ws(sent)))
-    if candidates:
-        chosen = min(candidates, key=lambda x: x[0])
-        return chosen[0], f"ifc-sentence: {chosen[1]}"
-    # 3) Small window around “IFC”
-    for i, sent in enumerate(sentences):
-        if 'ifc' in sent.lower():
-            window = " ".join(sentences[max(0, i-1):min(len(sentences), i+2)])
-            amts = find_amounts(window)
-            if amts:
-                chosen = min(amts, key=lambda x: x['amount'])
-                return chosen['amount'], f"ifc-window: {normalize_ws(window)}"
-    return None, None
+    return AmountIndex(text).ifc_investment()
 
 def pick_facility_notional(text: str) -> Tuple[Optional[float], Optional[str]]:
-    sentences = SENT_SPLIT.split(text)
-    cands = []
-    for sent in sentences:
-        low = sent.lower()
-        if any(term in low for term in FACILITY_TERMS):
-            for a in find_amounts(sent):
-                cands.append((a['amount'], normalize_ws(sent)))
-    if cands:
-        chosen = max(cands, key=lambda x: x[0])
-        return chosen[0], f"facility sentence: {chosen[1]}"
-    amts_all = find_amounts(text)
-    if amts_all:
-        top = max(amts_all, key=lambda x: x['amount'])
-        return top['amount'], f"page max: {top['raw']}"
-    return None, None
+    return AmountIndex(text).facility_notional()
 
 # --------------------------
-# JSON & PDF processing
+# Parse-once payload strings
 # --------------------------
-def walk_strings(obj: Any, out: List[str]):
-    if isinstance(obj, dict):
-        for v in obj.values(): walk_strings(v, out)
-    elif isinstance(obj, list):
-        for it in obj: walk_strings(it, out)
-    elif isinstance(obj, str):
-        out.append(obj)
+MIN_SECTION_STRING = min(len(t) for t in DESC_TITLES)
+# lxml rewrites these even in plain text (CR -> LF, NUL -> U+FFFD, leading BOM
+# dropped), so strings containing them are parsed rather than just stripped
+_NEEDS_PARSE = re.compile("[<&\r\x00\ufeff]")
+_TAG = re.compile(r"<[^>]*>")
+_WS = re.compile(r"\s+")
+
+class ParseStats:
+    """Counts parser runs against the runs the old three-pass walk would have made."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requested = 0
+        self.parsed = 0
+
+    def add(self, requested: int, parsed: int) -> None:
+        with self._lock:
+            self.requested += requested
+            self.parsed += parsed
+
+    @property
+    def avoided(self) -> int:
+        return self.requested - self.parsed
+
+PARSE_STATS = ParseStats()
+
+class ParsedString:
+    """
+    One JSON string leaf. The parsed tree, its text and each slice are
+    computed on first use only, so a string is parsed at most once, and
+    not at all if it is plain text or cannot contain a DESC_TITLES heading.
+    Text alone goes through the backend's tree-less fast path. Results for
+    long strings go through the run-wide memo (ifc_memo), so a block seen
+    in an earlier project is not parsed again.
+    """
+    __slots__ = ("raw", "markup", "can_have_section", "parsed", "_soup", "_text", "_block", "_text_slice", "_raw_slice")
+
+    def __init__(self, raw: str):
+        self.raw = raw or ""
+        self.markup = bool(_NEEDS_PARSE.search(self.raw))
+        self.can_have_section = self._heading_prefilter()
+        self.parsed = 0  # parser runs on this string
+        self._soup = self._text = self._block = self._text_slice = self._raw_slice = None
+
+    def _heading_prefilter(self) -> bool:
+        # Cheap superset test: any heading the parsed passes could find survives
+        # tag stripping, entity decoding and whitespace collapsing.
+        if len(self.raw) < MIN_SECTION_STRING:
+            return False
+        low = self.raw.lower()
+        if any(t in low for t in DESC_TITLES):
+            return True
+        if not self.markup:
+            return False
+        flat = _WS.sub(" ", html_lib.unescape(_TAG.sub(" ", low)))
+        return any(t in flat for t in DESC_TITLES)
+
+    @property
+    def soup(self):
+        if self._soup is None:
+            self._soup = parse_html(self.raw)
+            self.parsed += 1
+        return self._soup
+
+    def text(self) -> str:
+        """Same as html_to_text(raw)."""
+        if self._text is None:
+            if not self.markup:
+                self._text = self.raw.strip()
+            elif self._soup is not None:
+                self._text = self._soup.get_text("\n", strip=True)
+            else:
+                self._text = memoized("text/" + backend().name, self.raw, self._parse_text)
+        return self._text
+
+    def _parse_text(self) -> str:
+        self.parsed += 1
+        return html_text(self.raw)
+
+    def text_slice(self) -> Tuple[str, str]:
+        """Same as slice_section(html_to_text(raw))."""
+        if self._text_slice is None:
+            if not self.can_have_section:
+                self._text_slice = ("", "")
+            else:
+                self._text_slice = memoized("text_slice/" + backend().name, self.raw,
+                                            lambda: slice_section(self.text()))
+        return self._text_slice
+
+    def html_block(self) -> Tuple[str, str]:
+        """Same as slice_section_from_html_block(raw)."""
+        if self._block is None:
+            if not self.can_have_section:
+                self._block = ("", "")
+            elif not self.markup:
+                self._block = self.text_slice()  # no tags, so only the text fallback can fire
+            else:
+                self._block = memoized("html_block/" + backend().name, self.raw, self._find_block)
+        return self._block
+
+    def _find_block(self) -> Tuple[str, str]:
+        found = section_after_heading_tag(self.soup)
+        return found if found is not None else self.text_slice()
+
+    def raw_slice(self) -> Tuple[str, str]:
+        """Same as slice_section(raw)."""
+        if self._raw_slice is None:
+            if not self.can_have_section:
+                self._raw_slice = ("", "")
+            elif not self.markup:
+                self._raw_slice = self.text_slice()  # text is raw.strip(); the slice is identical
+            else:
+                self._raw_slice = memoized("raw_slice", self.raw, lambda: slice_section(self.raw))
+        return self._raw_slice
+
+def _usable_section(sec: str) -> bool:
+    low = sec.lower()
+    return not looks_like_boilerplate(low) and looks_like_real_spi_body(low)
+
+class PayloadStrings:
+    """All string leaves of one API payload, longest first, shared by section and corpus steps."""
+    def __init__(self, j: Any):
+        strings: List[str] = []
+        walk_strings(j, strings)
+        strings.sort(key=lambda s: len(s or ""), reverse=True)
+        self.items = [ParsedString(s) for s in strings]
+        self.requested = 0  # parses the old per-pass code would have run
+
+    def section(self) -> Tuple[str, str, str]:
+        passes = [
+            (ParsedString.html_block, "json_payload(html_block)", True),
+            (ParsedString.text_slice, "json_payload(html_text)", True),
+            (ParsedString.raw_slice, "json_payload(raw)", False),
+        ]
+        for fn, method, parses in passes:
+            for ps in self.items:
+                self.requested += parses
+                sec, title = fn(ps)
+                if sec and _usable_section(sec):
+                    return sec, title, method
+        return "", "", ""
+
+    def corpus(self, n: int = 10) -> str:
+        self.requested += len(self.items[:n])
+        return "\n\n".join(ps.text() for ps in self.items[:n])
+
+    def record_stats(self) -> None:
+        parsed = sum(ps.parsed for ps in self.items)
+        PARSE_STATS.add(self.requested, parsed)
+        count("parses", parsed)
 
 def from_json_payload(j: Any) -> Tuple[str, str, str]:
-    strings: List[str] = []
-    walk_strings(j, strings)
-    strings.sort(key=lambda s: len(s or ""), reverse=True)
+    return PayloadStrings(j).section()
 
-    # 1) HTML-aware block (preferred)
-    for s in strings:
-        sec, title = slice_section_from_html_block(s)
-        if sec:
-            low = sec.lower()
-            if not looks_like_boilerplate(low) and looks_like_real_spi_body(low):
-                return sec, title, "json_payload(html_block)"
-    # 2) HTML->text
-    for s in strings:
-        txt = html_to_text(s)
-        sec, title = slice_section(txt)
-        if sec:
-            low = sec.lower()
-            if not looks_like_boilerplate(low) and looks_like_real_spi_body(low):
-                return sec, title, "json_payload(html_text)"
-    # 3) Raw text
-    for s in strings:
-        sec, title = slice_section(s)
-        if sec:
-            low = sec.lower()
-            if not looks_like_boilerplate(low) and looks_like_real_spi_body(low):
-                return sec, title, "json_payload(raw)"
-    return "", "", ""
+# --------------------------
+# PDF extraction (lazy, budgeted, optionally in a process pool)
+# --------------------------
+PDF_MAX_PAGES = 60        # pages parsed per document before giving up
+PDF_TIME_LIMIT = 60.0     # seconds per document
+PDF_MEM_LIMIT_MB = 1024   # extra address space per pool worker
+PDF_POOL: Optional["PdfPool"] = None
 
-def extract_from_pdf_bytes(b: bytes) -> Tuple[str, str]:
+class PdfBudgetExceeded(Exception):
+    pass
+
+def _raise_budget(signum, frame):
+    raise PdfBudgetExceeded()
+
+def section_is_bounded(full_text: str) -> bool:
+    """
+    True once the top-priority heading (DESC_TITLES[0]) is followed by a
+    NEXT_CUES stop past the 400-char floor, i.e. more pages cannot change
+    the section slice_section returns. A lower-priority heading is not
+    enough: a later page could still bring a higher one, which
+    slice_section would prefer.
+    """
+    low = (full_text or "").lower()
+    start = low.find(DESC_TITLES[0])
+    if start == -1:
+        return False
+    nl = low.find("\n", start)
+    return nl != -1 and first_cue_stop(low, nl + 1) != -1
+
+def pdf_text_until_section(b: bytes, time_limit: float = PDF_TIME_LIMIT, max_pages: int = PDF_MAX_PAGES) -> str:
+    """
+    Same text as pdfminer's extract_text, but produced page by page and
+    cut short once section_is_bounded (so slice_section of the text is
+    final), after max_pages, or when the time budget runs out (partial
+    text is kept).
+    """
+    rsrcmgr = PDFResourceManager(caching=True)
+    out = io.StringIO()
+    device = TextConverter(rsrcmgr, out, codec="utf-8", laparams=LAParams())
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+    deadline = time.monotonic() + time_limit
     try:
-        txt = pdf_extract_text(io.BytesIO(b)) or ""
+        for n, page in enumerate(PDFPage.get_pages(io.BytesIO(b), caching=True), 1):
+            interpreter.process_page(page)
+            if section_is_bounded(out.getvalue()):
+                break
+            if n >= max_pages or time.monotonic() > deadline:
+                break
+    except PdfBudgetExceeded:
+        pass
+    finally:
+        device.close()
+    return out.getvalue()
+
+def _pdf_section_job(b: bytes, time_limit: float, max_pages: int) -> Tuple[str, str]:
+    # SIGALRM interrupts a single pathological page; only usable on a main thread
+    alarm = hasattr(signal, "SIGALRM") and threading.current_thread() is threading.main_thread()
+    if alarm:
+        prev = signal.signal(signal.SIGALRM, _raise_budget)
+        signal.setitimer(signal.ITIMER_REAL, time_limit)
+    try:
+        txt = pdf_text_until_section(b, time_limit, max_pages)
     except Exception:
         return "", ""
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, prev)
     return slice_section(txt)
 
+def _vm_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[0]) * resource.getpagesize()
+    except Exception:
+        return 0
+
+def _pdf_worker_init(mem_mb: int) -> None:
+    if resource is not None and mem_mb > 0:
+        # cap relative to what the interpreter already maps after imports
+        limit = _vm_bytes() + mem_mb * 1024 * 1024
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard == resource.RLIM_INFINITY or limit < hard:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+class PdfPool:
+    """
+    Runs PDF section extraction in worker processes so parsing uses all
+    cores while fetch threads keep downloading. Each document gets a time
+    and memory budget; a crashed worker only costs that document.
+    """
+    def __init__(self, workers: int, time_limit: float = PDF_TIME_LIMIT,
+                 max_pages: int = PDF_MAX_PAGES, mem_mb: int = PDF_MEM_LIMIT_MB):
+        self.workers, self.time_limit, self.max_pages, self.mem_mb = workers, time_limit, max_pages, mem_mb
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._ex = self._start()
+
+    def _start(self) -> ProcessPoolExecutor:
+        # spawn, not fork: the parent is multi-threaded by the time PDFs show up
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=mp.get_context("spawn"),
+                                   initializer=_pdf_worker_init, initargs=(self.mem_mb,))
+
+    def section(self, b: bytes) -> Tuple[str, str]:
+        ex = self._ex
+        try:
+            fut = ex.submit(_pdf_section_job, b, self.time_limit, self.max_pages)
+            return fut.result(timeout=self.time_limit + 30)
+        except (BrokenProcessPool, FutureTimeout):
+            self.failures += 1
+            with self._lock:
+                if self._ex is ex:
+                    ex.shutdown(wait=False, cancel_futures=True)
+                    self._ex = self._start()
+            return "", ""
+
+    def close(self) -> None:
+        self._ex.shutdown(wait=True, cancel_futures=True)
+
+def extract_from_pdf_bytes(b: bytes) -> Tuple[str, str]:
+    if PDF_POOL is not None:
+        return PDF_POOL.section(b)
+    return _pdf_section_job(b, PDF_TIME_LIMIT, PDF_MAX_PAGES)
+
+def add_pdf_args(ap) -> None:
+    ap.add_argument("--pdf-workers", type=int, default=0, help="processes for PDF text extraction (0 = inline)")
+    ap.add_argument("--pdf-max-pages", type=int, default=PDF_MAX_PAGES)
+    ap.add_argument("--pdf-time-limit", type=float, default=PDF_TIME_LIMIT, help="seconds per PDF")
+    ap.add_argument("--pdf-mem-mb", type=int, default=PDF_MEM_LIMIT_MB, help="memory cap per PDF worker process")
+
+def configure_pdf(args) -> None:
+    global PDF_POOL, PDF_MAX_PAGES, PDF_TIME_LIMIT
+    PDF_MAX_PAGES, PDF_TIME_LIMIT = args.pdf_max_pages, args.pdf_time_limit
+    if args.pdf_workers > 0:
+        PDF_POOL = PdfPool(args.pdf_workers, args.pdf_time_limit, args.pdf_max_pages, args.pdf_mem_mb)
+
+def close_pdf() -> None:
+    global PDF_POOL
+    if PDF_POOL is not None:
+        PDF_POOL.close()
+        PDF_POOL = None
+
+# --------------------------
+# JSON & PDF processing
+# --------------------------
 def find_pdf_urls_in_json(j: Any) -> List[str]:
     urls: List[str] = []
     strings: List[str] = []
@@ -311,20 +684,6 @@ def find_pdf_urls_in_json(j: Any) -> List[str]:
             seen.add(u); out.append(u)
     return out
 
-def parse_id_and_type(url: str) -> Tuple[Optional[str], Optional[str]]:
-    try:
-        p = urlparse(url)
-        parts = [x for x in p.path.split("/") if x]
-        for i, seg in enumerate(parts):
-            if seg == "project-detail" and i+2 < len(parts):
-                doc_type = parts[i+1].upper()  # SPI or SII
-                proj_id = parts[i+2]
-                proj_id = re.sub(r"^0+","", proj_id) or proj_id
-                return proj_id, doc_type
-    except Exception:
-        pass
-    return None, None
-
 # --------------------------
 # Output row
 # --------------------------
@@ -346,55 +705,153 @@ class RowOut:
     facility_note: Optional[str]
     all_amount_mentions: str
     amounts_json: str
+    sibling_endpoint: str = ""  # the other ProjectAccess variant (SPI <-> SII), if requested
+    sibling_http_status: Optional[int] = None
+    section_source_doc: str = ""  # SPI/SII: whose payload (or linked PDF) gave the section
+    amounts_source_doc: str = ""  # SPI/SII: whose text the amounts were read from
+
+OUT_HEADER = [
+    "project_id","project_name","url","http_status","fetch_status",
+    "section_text","section_title_found","extraction_method",
+    "used_json_endpoint","used_pdf_url",
+    "ifc_investment_usd","ifc_investment_note",
+    "facility_notional_usd","facility_note",
+    "all_amount_mentions","amounts_json",
+    "sibling_endpoint","sibling_http_status","section_source_doc","amounts_source_doc"
+]
 
 # --------------------------
 # Main fetcher
 # --------------------------
-def fetch_one(session: requests.Session, url: str, pname: str, timeout=30) -> RowOut:
-    proj_id, doc_type = parse_id_and_type(url)
-    if not proj_id or doc_type not in ("SPI","SII"):
-        return RowOut(proj_id or "", pname, url, None, "error:bad_url_format", "", "", "", "", None, None, None, None, "", "")
+def failed_row(proj_id: str, pname: str, url: str, fetch_status: str, api: str = "") -> RowOut:
+    """A row with no section or amounts, for a project that could not be read."""
+    return RowOut(
+        project_id=proj_id, project_name=pname, url=url, http_status=None, fetch_status=fetch_status,
+        section_text="", section_title_found="", extraction_method="", used_json_endpoint=api, used_pdf_url="",
+        ifc_investment_usd=None, ifc_investment_note=None, facility_notional_usd=None, facility_note=None,
+        all_amount_mentions="", amounts_json="",
+    )
 
-    api = f"https://disclosuresservice.ifc.org/api/ProjectAccess/{doc_type}Project?projectId={proj_id}"
+def error_row(url: str, pname: str, e: Exception) -> RowOut:
+    proj_id, _ = parse_id_and_type(url)
+    return failed_row(proj_id or "", pname, url, f"error:{type(e).__name__}:{e}")
+
+SIBLING = {"SPI": "SII", "SII": "SPI"}
+# parallel: fetch both variants up front; on-miss: fetch the sibling only
+# when the URL's own document has no section; off: never
+SIBLING_MODE = "parallel"
+
+def add_sibling_args(ap) -> None:
+    ap.add_argument("--sibling", choices=["parallel", "on-miss", "off"], default="parallel",
+                    help="also read the project's other ProjectAccess variant (SPI <-> SII) before trying PDFs")
+
+def configure_sibling(args) -> None:
+    global SIBLING_MODE
+    SIBLING_MODE = args.sibling
+
+def project_endpoints(proj_id: str, doc_type: str, fingerprinted: bool = False) -> List[str]:
+    """
+    The URL's own ProjectAccess endpoint, then its sibling when that is
+    fetched up front. With `fingerprinted` (--state), the sibling whenever
+    it may be read, so a change there is not hidden by a carried-forward row.
+    """
+    eps = [project_api_url(doc_type, proj_id)]
+    if SIBLING_MODE == "parallel" or (fingerprinted and SIBLING_MODE != "off"):
+        eps.append(project_api_url(SIBLING[doc_type], proj_id))
+    return eps
+
+def fetch_json(session, api: str, timeout=30) -> Tuple[Optional[int], Any, Optional[Exception]]:
     try:
         r = session.get(api, timeout=timeout)
-        status = r.status_code
-        j = r.json()
+        return r.status_code, r.json(), None
     except Exception as e:
-        return RowOut(proj_id, pname, url, None, f"error:api:{type(e).__name__}:{e}", "", "", api, "", None, None, None, None, "", "")
-
-    # 1) Section text
-    sec, title, method = from_json_payload(j)
+        return None, None, e
 
-    # 2) If no section, try PDFs mentioned in JSON
+def fetch_one(session: requests.Session, url: str, pname: str, timeout=30) -> RowOut:
+    proj_id, doc_type = parse_id_and_type(url)
+    if not proj_id or doc_type not in ("SPI","SII"):
+        return failed_row(proj_id or "", pname, url, "error:bad_url_format")
+
+    eps = project_endpoints(proj_id, doc_type)
+    with stage("api"):
+        got = fan_out(lambda ep: fetch_json(session, ep, timeout), eps)
+    status, j, err = got[0]
+    if err is not None:
+        return api_error_row(proj_id, pname, url, eps[0], err)
+    sibling = (eps[1],) + got[1] if len(eps) > 1 else None
+    return analyze_payload(session, proj_id, pname, url, eps[0], status, j, timeout, sibling)
+
+def api_error_row(proj_id: str, pname: str, url: str, api: str, e: Exception) -> RowOut:
+    return failed_row(proj_id, pname, url, f"error:api:{type(e).__name__}:{e}", api)
+
+def analyze_payload(session, proj_id: str, pname: str, url: str, api: str,
+                    status: Optional[int], j: Any, timeout=30,
+                    sibling: Optional[Tuple[str, Optional[int], Any, Optional[Exception]]] = None) -> RowOut:
+    """
+    Section and amount extraction for an already-fetched ProjectAccess
+    payload. `sibling` is the other variant's (endpoint, status, json,
+    error) if it was fetched with it; with --sibling on-miss it is fetched
+    here, only when needed.
+    """
+    _, doc_type = parse_id_and_type(url)
+    sib_type = SIBLING.get(doc_type or "", "")
+
+    # 1) Section text: the URL's own document first, then its sibling
+    with stage("section"):
+        payload = PayloadStrings(j)
+        sec, title, method = payload.section()
+    src = doc_type if sec else ""
+    if SIBLING_MODE == "off" or (SIBLING_MODE == "on-miss" and sec):
+        sibling = None  # fetched for another reason (a --state fingerprint); not read, so not reported
+    sib_json, sib_payload = None, None
+    if not sec and sib_type and SIBLING_MODE != "off":
+        if sibling is None and SIBLING_MODE == "on-miss":
+            sib_api = project_api_url(sib_type, proj_id)
+            with stage("api"):
+                sibling = (sib_api,) + fetch_json(session, sib_api, timeout)
+        if sibling is not None and sibling[3] is None and sibling[1] is not None and sibling[1] < 400:
+            sib_json = sibling[2]
+            with stage("section"):
+                sib_payload = PayloadStrings(sib_json)
+                sec, title, method = sib_payload.section()
+            src = sib_type if sec else ""
+
+    # 2) If still no section, try PDFs mentioned in either JSON
     used_pdf = ""
     if not sec:
-        pdf_urls = find_pdf_urls_in_json(j)
-        for pu in pdf_urls[:5]:
-            try:
-                pr = session.get(pu, timeout=timeout)
-                if pr.status_code == 200 and pr.content and len(pr.content) > 200:
-                    sec2, title2 = extract_from_pdf_bytes(pr.content)
-                    if sec2:
-                        sec, title, method = sec2, title2, "pdf_fallback"
-                        used_pdf = pu
-                        break
-            except Exception:
-                continue
+        with stage("pdf"):
+            pdf_urls = [(pu, doc_type) for pu in find_pdf_urls_in_json(j)]
+            if sib_json is not None:
+                seen = {pu for pu, _ in pdf_urls}
+                pdf_urls += [(pu, sib_type) for pu in find_pdf_urls_in_json(sib_json) if pu not in seen]
+            for pu, pdf_src in pdf_urls[:5]:
+                try:
+                    pr = session.get(pu, timeout=timeout)
+                    if pr.status_code == 200 and pr.content and len(pr.content) > 200:
+                        sec2, title2 = extract_from_pdf_bytes(pr.content)
+                        if sec2:
+                            sec, title, method = sec2, title2, "pdf_fallback"
+                            used_pdf, src = pu, pdf_src
+                            break
+                except Exception:
+                    continue
 
     # 3) Build corpus for amounts
     if sec:
-        text_corpus = sec
+        text_corpus, amt_src = sec, src
     else:
-        strings: List[str] = []
-        walk_strings(j, strings)
-        strings.sort(key=lambda s: len(s or ""), reverse=True)
-        text_corpus = "\n\n".join(html_to_text(s) for s in strings[:10])
+        with stage("corpus"):
+            text_corpus, amt_src = payload.corpus(10), doc_type
+            if not text_corpus.strip() and sib_payload is not None:
+                text_corpus, amt_src = sib_payload.corpus(10), sib_type
+    payload.record_stats()
+    if sib_payload is not None:
+        sib_payload.record_stats()
 
     # 4) Amount extraction
-    amount_hits = amounts_with_context(text_corpus)
-    ifc_amt, ifc_note = pick_ifc_investment(text_corpus)
-    fac_amt, fac_note = pick_facility_notional(text_corpus)
+    with stage("amounts"):
+        amount_hits, (ifc_amt, ifc_note), (fac_amt, fac_note) = memoized(
+            "amounts", text_corpus, lambda: amount_picks(text_corpus))
 
     all_mentions = " | ".join([f"{h['raw']}=>{int(h['amount_usd'])}" for h in amount_hits]) if amount_hits else ""
     amounts_json = json.dumps(amount_hits, ensure_ascii=False)
@@ -408,7 +865,9 @@ def fetch_one(session: requests.Session, url: str, pname: str, timeout=30) -> Ro
         used_json_endpoint=api, used_pdf_url=used_pdf,
         ifc_investment_usd=ifc_amt, ifc_investment_note=ifc_note,
         facility_notional_usd=fac_amt, facility_note=fac_note,
-        all_amount_mentions=all_mentions, amounts_json=amounts_json
+        all_amount_mentions=all_mentions, amounts_json=amounts_json,
+        sibling_endpoint=sibling[0] if sibling else "", sibling_http_status=sibling[1] if sibling else None,
+        section_source_doc=src or "", amounts_source_doc=amt_src or "",
     )
 
 def main():
@@ -418,29 +877,94 @@ def main():
     ap.add_argument("--url-col", default="Project Url")
     ap.add_argument("--name-col", default="Project Name")
     ap.add_argument("--max-rows", type=int, default=0)
+    add_concurrency_args(ap)
+    add_rate_args(ap)
+    add_pdf_args(ap)
+    add_sibling_args(ap)
+    add_cache_args(ap)
+    add_resume_args(ap)
+    add_state_args(ap)
+    add_shard_args(ap)
+    add_parquet_args(ap)
+    add_text_args(ap)
+    add_metrics_args(ap)
+    add_memo_args(ap)
     args = ap.parse_args()
-
-    df = pd.read_csv(args.input)
-    rows = df.to_dict(orient="records")
-    if args.max_rows and args.max_rows > 0:
-        rows = rows[:args.max_rows]
-
-    out_header = [
-        "project_id","project_name","url","http_status","fetch_status",
-        "section_text","section_title_found","extraction_method",
-        "used_json_endpoint","used_pdf_url",
-        "ifc_investment_usd","ifc_investment_note",
-        "facility_notional_usd","facility_note",
-        "all_amount_mentions","amounts_json"
-    ]
-
-    with requests.Session() as s, open(args.output, "w", newline="", encoding="utf-8") as fh:
-        writer = csv.DictWriter(fh, fieldnames=out_header)
-        writer.writeheader()
-        for i, r in enumerate(rows, 1):
-            row = fetch_one(s, str(r[args.url_col]).strip(), str(r.get(args.name_col,"")))
-            writer.writerow(asdict(row))
-            if i % 10 == 0: fh.flush()
+    set_backend(args.text_backend)
+    cache = cache_from_args(args)
+    state = state_from_args(args)
+    sink = parquet_from_args(args, OUT_HEADER)
+    configure_pdf(args)
+    configure_sibling(args)
+    memo = configure_memo(args)
+
+    shard = shard_from_args(args)
+    rows = shard_rows(open_input_rows(args.input, args.url_col, args.name_col, args.max_rows), shard)
+    header = OUT_HEADER + (METRIC_COLUMNS if args.metrics_columns else [])
+
+    def extract(sess, url: str, pname: str) -> dict:
+        try:
+            return asdict(fetch_one(sess, url, pname))
+        except Exception as e:
+            return asdict(error_row(url, pname, e))
+
+    def process(url: str, pname: str) -> dict:
+        if not state:
+            return extract(session, url, pname)
+        pid, doc_type = parse_id_and_type(url)
+        eps = project_endpoints(pid, doc_type, fingerprinted=True) if pid and doc_type in ("SPI", "SII") else []
+        return run_incremental(state, "amounts", url, session, eps, lambda sess: extract(sess, url, pname))
+
+    def work(r: Tuple[str, str]) -> dict:
+        url, pname = r
+        if not metrics:
+            return process(url, pname)
+        with metrics.project() as rec:
+            row = process(url, pname)
+        return metrics.record(rec, row, parse_id_and_type(url)[1] or "")
+
+    with make_session(args.workers) as s, CheckpointWriter(args.output, header, resume=args.resume) as out:
+        # metered under the limiter so every attempt is counted (a no-op unless metrics are on)
+        session = throttled = throttle_from_args(HostCappedSession(MeteredSession(s), args.per_host), args)
+        if state:
+            session = ConditionalSession(session, state)
+        if cache:
+            session = CachingSession(session, cache, offline=args.offline, bypass=API_BASE if state else None)
+        if out.resumed:
+            print(f"[resume] {out.resumed} projects already in {args.output}; skipping them")
+        if sink and out.resumed:
+            print(f"[parquet] backfilled {sink.backfill(args.output)} rows missing from {args.parquet_dir}")
+        todo = (r for r in rows if r[0] not in out.done)
+        metrics = metrics_from_args(args, lambda: (r for r in shard_rows(open_input_rows(
+            args.input, args.url_col, args.name_col, args.max_rows, warn=False), shard) if r[0] not in out.done))
+        # rows arrive in input order and each is journaled once it is on disk
+        try:
+            for row in run_ordered(work, todo, args.workers):
+                out.writerow(row)
+                if sink:
+                    sink.write(row)
+                if metrics:
+                    metrics.tick()
+        finally:
+            if sink:
+                sink.close()
+                print(f"[parquet] {sink.rows} projects, {sink.mentions} mentions -> {args.parquet_dir}")
+
+    print(f"[rate] {throttled.limiter.stats()}")
+    print(f"[parse] {PARSE_STATS.parsed} HTML parses run, {PARSE_STATS.avoided} avoided")
+    if memo is not None:
+        print(f"[memo] {memo.stats()}")
+    close_pdf()
+    if cache:
+        print(f"[cache] {cache.stats()}")
+        cache.close()
+    if state:
+        print(f"[incremental] {state.stats()}")
+        state.close()
+    if metrics:
+        print(f"[metrics] {metrics.line()}")
+        if args.metrics_json:
+            metrics.write_summary(args.metrics_json)
 
 if __name__ == "__main__":
     main()
@@ -11,26 +11,46 @@ Usage (test a small batch first):
     --max-rows 50
 """
 
-import argparse, csv, json, re, time, random
+import argparse, csv, json, re
+import html as html_lib
 from dataclasses import dataclass, asdict
-from typing import Any, List, Optional, Tuple
-from urllib.parse import urlparse
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
 
-import pandas as pd
 import requests
 from bs4 import BeautifulSoup
 
+from ifc_cache import CachingSession, add_cache_args, cache_from_args
+from ifc_checkpoint import CheckpointWriter, add_resume_args
+from ifc_memo import add_memo_args, configure_memo, memoized
+from ifc_metrics import METRIC_COLUMNS, MeteredSession, add_metrics_args, count, metrics_from_args, stage
+from ifc_ratelimit import add_rate_args, throttle_from_args
+from ifc_shard import add_shard_args, shard_from_args, shard_rows
+from ifc_state import ConditionalSession, add_state_args, run_incremental, state_from_args
+from ifc_taxonomy import add_taxonomy_args, load_taxonomy
+from ifc_text import BACKENDS, add_text_args
+from ifc_common import API_BASE, make_session, normalize_ws, open_input_rows, parse_id_and_type, walk_strings
+
 # --- sentence splitting & keyword matching ---
 SENT_SPLIT = re.compile(r'(?<=[\.\?\!])\s+|[\r\n]+')
 EXPORT_RE = re.compile(r'\bexport\w*', re.IGNORECASE)   # export, exports, exporting, exporter(s)
 
-def normalize_ws(s: str) -> str:
-    return re.sub(r"[ \t]+", " ", (s or "").replace("\xa0", " ")).strip()
+# None = BeautifulSoup with html.parser (below); else an ifc_text backend (--text-backend)
+TEXT_BACKEND = None
+# None = no categorized signals; else an ifc_taxonomy.Taxonomy (--taxonomy)
+TAXONOMY = None
 
 def soup_text(s: str) -> str:
-    """Strip HTML/XML to text safely."""
+    """Strip HTML/XML to text safely; long strings are converted once per run (ifc_memo)."""
     if not s:
         return ""
+    return memoized("soup_text/" + (TEXT_BACKEND.name if TEXT_BACKEND is not None else "bs4"), s,
+                    lambda: _convert(s))
+
+def _convert(s: str) -> str:
+    if TEXT_BACKEND is not None and not s.strip().lower().startswith(("<?xml", "<xml")):
+        return TEXT_BACKEND.text(s)
     try:
         # pick xml parser if it looks like xml; else html
         looks_xml = s.strip().lower().startswith("<?xml") or s.strip().lower().startswith("<xml")
@@ -39,71 +59,92 @@ def soup_text(s: str) -> str:
     except Exception:
         return s
 
-def walk_strings(obj: Any, out: List[str]) -> None:
-    """Collect all string leaves from nested JSON."""
-    if isinstance(obj, str):
-        out.append(obj)
-    elif isinstance(obj, list):
-        for it in obj:
-            walk_strings(it, out)
-    elif isinstance(obj, dict):
-        for v in obj.values():
-            walk_strings(v, out)
-
-def parse_id_and_type(url: str) -> Tuple[Optional[str], Optional[str]]:
-    """Extract projectId and doc type (SPI/SII) from a disclosure URL."""
+def configure_text(name: str) -> None:
+    global TEXT_BACKEND
+    TEXT_BACKEND = None if name == "bs4" else BACKENDS[name]()
+
+def configure_taxonomy(spec: str) -> None:
+    global TAXONOMY
+    TAXONOMY = load_taxonomy(spec)
+
+def get_json(session: requests.Session, url: str) -> Tuple[Optional[Any], Optional[int]]:
+    """One JSON GET; pacing and 429/5xx retries are the session's job (ThrottledSession)."""
     try:
-        p = urlparse(url)
-        parts = [x for x in p.path.split("/") if x]
-        for i, seg in enumerate(parts):
-            if seg == "project-detail" and i + 2 < len(parts):
-                dtype = parts[i + 1].upper()  # SPI or SII
-                pid = re.sub(r"^0+", "", parts[i + 2])
-                return pid, dtype
+        r = session.get(url, timeout=30)
     except Exception:
-        pass
-    return None, None
-
-def make_session() -> requests.Session:
-    s = requests.Session()
-    s.headers.update({
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X) IFC-Export-Scanner/1.0",
-        "Accept": "application/json, text/plain, */*",
-        "Connection": "keep-alive",
-    })
-    s.timeout = 30
-    return s
-
-def get_json(session: requests.Session, url: str, retries: int = 3) -> Tuple[Optional[Any], Optional[int]]:
-    last = None
-    for _ in range(retries):
-        try:
-            r = session.get(url, timeout=30)
-            last = r.status_code
-            if r.ok:
-                return r.json(), r.status_code
-        except Exception:
-            pass
-        time.sleep(0.5 + random.random()*0.7)
-    return None, last
+        return None, None
+    if not r.ok:
+        return None, r.status_code
+    try:
+        return r.json(), r.status_code
+    except ValueError:
+        return None, r.status_code
+
+def unique_sentences(texts: Iterable[str]) -> Iterator[str]:
+    """Sentences with light cleanup, deduplicated case-insensitively, in text order."""
+    seen = set()
+    for text in texts:
+        # SENT_SPLIT breaks on newlines, so no sentence spans two joined texts
+        for sent in SENT_SPLIT.split(text):
+            s = normalize_ws(sent)
+            if s:
+                key = s.lower()
+                if key not in seen:
+                    seen.add(key)
+                    yield s
+
+def export_sentences(texts: Iterable[str]) -> Iterator[str]:
+    """Deduplicated sentences containing 'export*' with light cleanup, in text order."""
+    return (s for s in unique_sentences(texts) if EXPORT_RE.search(s))
+
+def text_export_sentences(text: str) -> List[str]:
+    """export_sentences of one text, kept in the run-wide memo for long texts."""
+    return memoized("export_sentences", text, lambda: list(export_sentences([text])))
 
 def sentences_with_export(text: str, max_sentences: int = 20) -> List[str]:
     """Return deduplicated sentences containing 'export*' with light cleanup."""
-    hits, seen = [], set()
     if not text:
-        return hits
-    for sent in SENT_SPLIT.split(text):
-        s = normalize_ws(sent)
-        if not s:
-            continue
-        if EXPORT_RE.search(s):
-            key = s.lower()
-            if key not in seen:
-                seen.add(key)
-                hits.append(s)
-                if len(hits) >= max_sentences:
-                    break
-    return hits
+        return []
+    return list(islice(export_sentences([text]), max_sentences))
+
+def may_mention_export(s: str) -> bool:
+    """Cheap prefilter: only strings containing 'export' (possibly behind an entity) are parsed."""
+    return "export" in s.lower() or ("&" in s and "export" in html_lib.unescape(s).lower())
+
+class ExportScan:
+    """
+    Lazy export-sentence scan over payload strings: each string is
+    prefiltered, converted to text only if it passes, and split into
+    sentences. The caller stops pulling once it has enough, so the rest is
+    never parsed; `chars` counts the text actually scanned.
+    """
+    def __init__(self, strings: Iterable[str], to_text: Callable[[str], str] = soup_text):
+        self.strings = strings
+        self.to_text = to_text
+        self.chars = 0
+
+    def texts(self) -> Iterator[str]:
+        for s in self.strings:
+            if not s or not may_mention_export(s):
+                continue
+            t = self.to_text(s)
+            count("parses")
+            if t:
+                self.chars += len(t)
+                yield t
+
+    def sentences(self, max_sentences: int) -> List[str]:
+        return list(islice(self._export_sentences(), max_sentences))
+
+    def _export_sentences(self) -> Iterator[str]:
+        # same as export_sentences(self.texts()): per-text results, deduplicated across texts
+        seen = set()
+        for t in self.texts():
+            for s in text_export_sentences(t):
+                key = s.lower()
+                if key not in seen:
+                    seen.add(key)
+                    yield s
 
 @dataclass
 class OutRow:
@@ -115,38 +156,81 @@ class OutRow:
     used_json_endpoints: str
     export_hits: int
     export_sentences: str  # pipe-separated
-    text_scanned_chars: int
+    text_scanned_chars: int  # characters of text converted and scanned before stopping
+    category_hits: str = ""  # JSON {category: sentences with a hit}, with --taxonomy
+    category_sentences: str = ""  # JSON {category: [first 24 such sentences]}
+
+OUT_FIELDS = [
+    "project_id","project_name","url","http_status","fetch_status",
+    "used_json_endpoints","export_hits","export_sentences","text_scanned_chars",
+    "category_hits","category_sentences"
+]
+
+# Endpoints whose JSON is scanned. Templates with {pid} are per-project;
+# the rest are global (identical for every project), so they are fetched at
+# most once per run and never mixed into a project's text.
+ENDPOINTS = [
+    f"{API_BASE}/ProjectAccess/SPIProject?projectId={{pid}}",
+    f"{API_BASE}/ProjectAccess/SIIProject?projectId={{pid}}",
+    f"{API_BASE}/ProjectAccess/validateProjectUrl?ProjectNumber={{pid}}&documentType=SPI",
+    f"{API_BASE}/searchprovider/landingPageDetails?isLanding=1",
+]
+
+def is_global_endpoint(template: str) -> bool:
+    return "{pid}" not in template
+
+def export_endpoints(pid: str) -> List[str]:
+    """Per-project API endpoints scanned for one project."""
+    return [t.format(pid=pid) for t in ENDPOINTS if not is_global_endpoint(t)]
+
+def global_endpoints() -> List[str]:
+    return [t for t in ENDPOINTS if is_global_endpoint(t)]
+
+def scan_global_payloads(fetched: List[Tuple[str, Optional[Any], Optional[int]]]) -> List[OutRow]:
+    """One row per global endpoint, so its text is attributed to the endpoint, not to projects."""
+    rows = []
+    for ep, j, st in fetched:
+        label = "global:" + ep.split("/api/", 1)[-1].split("?", 1)[0]
+        rows.append(scan_payloads("", label, ep, [(ep, j, st)]))
+    return rows
+
+def error_row(url: str, name: str, e: Exception) -> OutRow:
+    return OutRow("", name, url, None, f"error:{type(e).__name__}:{e}", "", 0, "", 0)
 
 def fetch_one(session: requests.Session, url: str, name: str) -> OutRow:
     pid, _ = parse_id_and_type(url)
     if not pid:
         return OutRow("", name, url, None, "error:bad_url", "", 0, "", 0)
 
-    endpoints = [
-        f"https://disclosuresservice.ifc.org/api/ProjectAccess/SPIProject?projectId={pid}",
-        f"https://disclosuresservice.ifc.org/api/ProjectAccess/SIIProject?projectId={pid}",
-        f"https://disclosuresservice.ifc.org/api/ProjectAccess/validateProjectUrl?ProjectNumber={pid}&documentType=SPI",
-        f"https://disclosuresservice.ifc.org/api/searchprovider/landingPageDetails?isLanding=1",
-    ]
+    with stage("api"):
+        fetched = [(ep,) + get_json(session, ep) for ep in export_endpoints(pid)]
+    return scan_payloads(pid, name, url, fetched)
 
+def scan_payloads(pid: str, name: str, url: str, fetched: List[Tuple[str, Optional[Any], Optional[int]]]) -> OutRow:
+    """Export-sentence scan over already-fetched (endpoint, json, status) results."""
     used, statuses, payload_strings = [], [], []
-    for ep in endpoints:
-        j, st = get_json(session, ep)
+    for ep, j, st in fetched:
         if st is not None:
             statuses.append(st)
         if j is not None:
             used.append(ep)
             walk_strings(j, payload_strings)
 
-    # Sort strings by length so bigger narrative blocks are scanned first
-    payload_strings.sort(key=lambda s: len(s or ""), reverse=True)
-    # Convert all to plain text and join a subset to keep it fast
-    texts = [soup_text(s) for s in payload_strings[:120]]
-    big = "\n".join(t for t in texts if t)
-
-    hits = sentences_with_export(big, max_sentences=24)
+    # Sort strings by length so bigger narrative blocks are scanned first;
+    # only the first 120 are considered, and only until 24 sentences are found
+    with stage("scan"):
+        payload_strings.sort(key=lambda s: len(s or ""), reverse=True)
+        strings = payload_strings[:120]
+        to_text = lru_cache(maxsize=None)(soup_text) if TAXONOMY else soup_text  # both passes share conversions
+        scan = ExportScan(strings, to_text)
+        hits = scan.sentences(max_sentences=24)
+        category_hits = category_sentences = ""
+        if TAXONOMY:
+            counts, kept = TAXONOMY.scan(unique_sentences(to_text(s) for s in strings if s), max_sentences=24)
+            category_hits = json.dumps(counts)
+            category_sentences = json.dumps(kept, ensure_ascii=False)
     status = statuses[-1] if statuses else None
-    fetch_status = "ok" if texts else "ok_but_no_text"
+    fetch_status = "ok" if payload_strings else "ok_but_no_text"
     return OutRow(
         project_id=pid,
         project_name=name,
@@ -156,9 +240,20 @@ def fetch_one(session: requests.Session, url: str, name: str) -> OutRow:
         used_json_endpoints=" | ".join(used),
         export_hits=len(hits),
         export_sentences=" || ".join(hits),
-        text_scanned_chars=len(big)
+        text_scanned_chars=scan.chars,
+        category_hits=category_hits,
+        category_sentences=category_sentences
     )
 
+def write_global_rows(session, path: str) -> None:
+    fetched = [(ep,) + get_json(session, ep) for ep in global_endpoints()]
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=OUT_FIELDS)
+        writer.writeheader()
+        for row in scan_global_payloads(fetched):
+            writer.writerow(asdict(row))
+    print(f"[global] wrote: {path}")
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--input", required=True, help="CSV/TSV with at least the disclosure URL")
@@ -166,46 +261,85 @@ def main():
     ap.add_argument("--url-col", default="Project Url")
     ap.add_argument("--name-col", default="Project Name")
     ap.add_argument("--max-rows", type=int, default=0)
+    ap.add_argument("--global-output", default="",
+                    help="also scan the project-independent endpoints once and write their hits here "
+                         "(by default they are not fetched)")
+    add_rate_args(ap)
+    add_cache_args(ap)
+    add_resume_args(ap)
+    add_state_args(ap)
+    add_shard_args(ap)
+    add_text_args(ap, default="bs4")
+    add_metrics_args(ap)
+    add_taxonomy_args(ap)
+    add_memo_args(ap)
     args = ap.parse_args()
+    cache = cache_from_args(args)
+    state = state_from_args(args)
+    configure_text(args.text_backend)
+    configure_taxonomy(args.taxonomy)
+    memo = configure_memo(args)
 
-    # Let pandas sniff delimiter (CSV or TSV)
-    df = pd.read_csv(args.input, sep=None, engine="python")
-    cols = list(df.columns)
-    if args.url_col not in cols:
-        raise SystemExit(f"[fatal] URL column not found: {args.url_col}\nAvailable: {cols}")
-    if args.name_col not in cols:
-        print(f"[warn] name column '{args.name_col}' not found; using empty names.")
-    rows = df.to_dict(orient="records")
-    if args.max_rows and args.max_rows > 0:
-        rows = rows[:args.max_rows]
-
-    out_fields = [
-        "project_id","project_name","url","http_status","fetch_status",
-        "used_json_endpoints","export_hits","export_sentences","text_scanned_chars"
-    ]
-
-    with open(args.output, "w", newline="", encoding="utf-8") as fh:
-        writer = csv.DictWriter(fh, fieldnames=out_fields)
-        writer.writeheader()
-        fh.flush()
+    # Streamed; delimiter (CSV or TSV) sniffed from the first block
+    shard = shard_from_args(args)
+    rows = shard_rows(open_input_rows(args.input, args.url_col, args.name_col, args.max_rows), shard)
+
+    header = OUT_FIELDS + (METRIC_COLUMNS if args.metrics_columns else [])
+    with CheckpointWriter(args.output, header, resume=args.resume) as writer:
+        if writer.resumed:
+            print(f"[resume] {writer.resumed} projects already in {args.output}; skipping them")
+        metrics = metrics_from_args(args, lambda: (r for r in shard_rows(open_input_rows(
+            args.input, args.url_col, args.name_col, args.max_rows, warn=False), shard)
+            if r[0].startswith("http") and r[0] not in writer.done))
         with make_session() as s:
-            for i, r in enumerate(rows, 1):
-                url = str(r[args.url_col]).strip()
-                name = str(r.get(args.name_col, "")) if args.name_col in r else ""
+            throttled = throttle_from_args(MeteredSession(s), args)
+            session = ConditionalSession(throttled, state) if state else throttled
+            if cache:
+                session = CachingSession(session, cache, offline=args.offline, bypass=API_BASE if state else None)
+            if args.global_output:
+                write_global_rows(session, args.global_output)
+            for i, (url, name) in enumerate(rows, 1):
                 if not url or not url.startswith("http"):
                     print(f"[{i}] skip (no url): {name}")
                     continue
-                print(f"[{i}/{len(rows)}] {url}")
-                try:
-                    out = fetch_one(s, url, name)
-                except Exception as e:
-                    print(f"[{i}] ERROR: {e}")
-                    out = OutRow("", name, url, None, f"error:{type(e).__name__}:{e}", "", 0, "", 0)
-                writer.writerow(asdict(out))
-                if i % 10 == 0:
-                    fh.flush()
-                time.sleep(0.12)  # be polite
+                if url in writer.done:
+                    continue
+                print(f"[{i}] {url}")
+                def scan(sess) -> dict:
+                    try:
+                        return asdict(fetch_one(sess, url, name))
+                    except Exception as e:
+                        print(f"[{i}] ERROR: {e}")
+                        return asdict(error_row(url, name, e))
+
+                def process() -> dict:
+                    if not state:
+                        return scan(session)
+                    pid, _ = parse_id_and_type(url)
+                    eps = export_endpoints(pid) if pid else []
+                    return run_incremental(state, "exports", url, session, eps, scan)
+
+                if not metrics:
+                    writer.writerow(process())
+                    continue
+                with metrics.project() as rec:
+                    row = process()
+                writer.writerow(metrics.record(rec, row, parse_id_and_type(url)[1] or ""))
+                metrics.tick()
 
+    print(f"[rate] {throttled.limiter.stats()}")
+    if memo is not None:
+        print(f"[memo] {memo.stats()}")
+    if cache:
+        print(f"[cache] {cache.stats()}")
+        cache.close()
+    if state:
+        print(f"[incremental] {state.stats()}")
+        state.close()
+    if metrics:
+        print(f"[metrics] {metrics.line()}")
+        if args.metrics_json:
+            metrics.write_summary(args.metrics_json)
     print(f"[done] wrote: {args.output}")
 
 if __name__ == "__main__":
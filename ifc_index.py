@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Local full-text index over the disclosure text, for keyword studies
+without another crawl.
+
+The pipeline's --index PATH stores every sentence of each project's
+per-project API payloads (the text the export scanner reads, converted and
+split the same way) in SQLite, keyed by project id and source endpoint,
+with an FTS5 index over the sentences. A project whose payloads are
+unchanged since it was last indexed is skipped.
+
+  python ifc_pipeline.py --input projects.csv --out exports=exports.csv --index disclosures.sqlite
+
+Query it offline; the output has the export scanner's columns (OutRow),
+with export_hits / export_sentences holding the matches. QUERY is FTS5
+syntax: export*, "local content", NEAR(value chain, 3), "supply chain" OR sourcing.
+export* is the scanner's pattern, but it can find more: the index keeps
+every payload string, not only the 120 longest. text_scanned_chars is
+all the indexed text, not what the scanner read before its 24th hit.
+
+  python ifc_index.py --index disclosures.sqlite query "local content" --output local_content.csv
+  python ifc_index.py --index disclosures.sqlite stats
+"""
+
+import argparse, csv, os, sqlite3, threading, time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ifc_common import normalize_ws, walk_strings
+from ifc_find_exports_v1 import OUT_FIELDS, SENT_SPLIT, soup_text
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    url TEXT PRIMARY KEY, project_id TEXT, project_name TEXT, fingerprint TEXT,
+    http_status INTEGER, endpoints TEXT, chars INTEGER, indexed_at REAL);
+CREATE TABLE IF NOT EXISTS sentences (
+    id INTEGER PRIMARY KEY, url TEXT NOT NULL, project_id TEXT, source TEXT, seq INTEGER, text TEXT);
+CREATE INDEX IF NOT EXISTS sentences_url ON sentences(url);
+CREATE VIRTUAL TABLE IF NOT EXISTS sentences_fts USING fts5(text, content='sentences', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS sentences_ai AFTER INSERT ON sentences BEGIN
+    INSERT INTO sentences_fts(rowid, text) VALUES (new.id, new.text); END;
+CREATE TRIGGER IF NOT EXISTS sentences_ad AFTER DELETE ON sentences BEGIN
+    INSERT INTO sentences_fts(sentences_fts, rowid, text) VALUES ('delete', old.id, old.text); END;
+"""
+
+def source_label(endpoint: str) -> str:
+    return endpoint.split("/api/", 1)[-1].split("?", 1)[0]
+
+def payload_sentences(fetched: List[Tuple[str, Optional[Any], Optional[int]]]) -> Tuple[List[Tuple[str, str]], int]:
+    """
+    (source, sentence) pairs from (endpoint, json, status) results, longest
+    strings first as in the export scan, deduplicated case-insensitively;
+    plus the number of text characters they came from.
+    """
+    strings: List[Tuple[str, str]] = []
+    for ep, j, _ in fetched:
+        if j is not None:
+            found: List[str] = []
+            walk_strings(j, found)
+            strings.extend((source_label(ep), s) for s in found)
+    strings.sort(key=lambda p: len(p[1] or ""), reverse=True)
+    seen, out, chars = set(), [], 0
+    for source, s in strings:
+        t = soup_text(s) if s else ""
+        chars += len(t)
+        for sent in SENT_SPLIT.split(t):
+            sent = normalize_ws(sent)
+            if sent and sent.lower() not in seen:
+                seen.add(sent.lower())
+                out.append((source, sent))
+    return out, chars
+
+class SentenceIndex:
+    """
+    Write side doubles as a pipeline output (done / resumed / writerow /
+    close), so the pipeline treats it like a CheckpointWriter.
+    """
+    def __init__(self, path: str, resume: bool = False, commit_every: int = 200):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self.commit_every = commit_every
+        self._pending = 0
+        self.done = {r[0] for r in self._db.execute("SELECT url FROM projects")} if resume else set()
+        self.resumed = len(self.done)
+        self.indexed = self.unchanged = 0
+
+    def fingerprint(self, url: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT fingerprint FROM projects WHERE url=?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def writerow(self, row: Dict[str, Any]) -> None:
+        """Store one project: row as built by the pipeline's index analyzer."""
+        url = row["url"]
+        if row.get("sentences") is None:  # payloads unchanged since the last index run
+            self.unchanged += 1
+            self.done.add(url)
+            return
+        with self._lock:
+            self._db.execute("DELETE FROM sentences WHERE url=?", (url,))
+            self._db.execute(
+                """INSERT INTO projects VALUES (?,?,?,?,?,?,?,?) ON CONFLICT(url) DO UPDATE SET
+                   project_id=excluded.project_id, project_name=excluded.project_name,
+                   fingerprint=excluded.fingerprint, http_status=excluded.http_status,
+                   endpoints=excluded.endpoints, chars=excluded.chars, indexed_at=excluded.indexed_at""",
+                (url, row["project_id"], row["project_name"], row["fingerprint"], row["http_status"],
+                 row["endpoints"], row["chars"], time.time()))
+            self._db.executemany(
+                "INSERT INTO sentences(url, project_id, source, seq, text) VALUES (?,?,?,?,?)",
+                [(url, row["project_id"], src, seq, text) for seq, (src, text) in enumerate(row["sentences"])])
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._db.commit()
+                self._pending = 0
+        self.indexed += 1
+        self.done.add(url)
+
+    def query(self, match: str, max_sentences: int = 24, hits_only: bool = False) -> Iterator[Dict[str, Any]]:
+        """OutRow-shaped rows, one per indexed project, in the order projects were first indexed."""
+        hits: Dict[str, List[str]] = {}
+        with self._lock:
+            for url, text in self._db.execute(
+                    """SELECT s.url, s.text FROM sentences_fts JOIN sentences s ON s.id = sentences_fts.rowid
+                       WHERE sentences_fts MATCH ? ORDER BY s.url, s.seq""", (match,)):
+                hits.setdefault(url, []).append(text)
+            projects = self._db.execute(
+                "SELECT url, project_id, project_name, http_status, endpoints, chars FROM projects ORDER BY rowid"
+            ).fetchall()
+        for url, pid, name, status, endpoints, chars in projects:
+            sents = hits.get(url, [])[:max_sentences]
+            if hits_only and not sents:
+                continue
+            yield {
+                "project_id": pid, "project_name": name, "url": url, "http_status": status,
+                "fetch_status": "ok" if chars else "ok_but_no_text", "used_json_endpoints": endpoints,
+                "export_hits": len(sents), "export_sentences": " || ".join(sents), "text_scanned_chars": chars,
+            }
+
+    def stats(self) -> str:
+        with self._lock:
+            n = self._db.execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+            s = self._db.execute("SELECT COUNT(*) FROM sentences").fetchone()[0]
+        size = os.path.getsize(self.path) / 1e6 if os.path.exists(self.path) else 0.0
+        return f"{n} projects, {s} sentences, {size:.1f} MB"
+
+    def close(self, completed: bool = True) -> None:
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+def main():
+    ap = argparse.ArgumentParser(description="Query the disclosure sentence index built by ifc_pipeline.py --index")
+    ap.add_argument("--index", required=True, help="SQLite index file")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    q = sub.add_parser("query", help="matching sentences per project, as an export-scanner style CSV")
+    q.add_argument("match", help='FTS5 query, e.g. export* or "local content"')
+    q.add_argument("--output", required=True)
+    q.add_argument("--max-sentences", type=int, default=24, help="sentences kept per project")
+    q.add_argument("--hits-only", action="store_true", help="leave out projects without a match")
+    sub.add_parser("stats", help="index size")
+    args = ap.parse_args()
+
+    if not os.path.exists(args.index):
+        raise SystemExit(f"[fatal] no index at {args.index}; build one with ifc_pipeline.py --index")
+    index = SentenceIndex(args.index)
+    if args.cmd == "stats":
+        print(f"[index] {index.stats()}")
+    else:
+        t0 = time.perf_counter()
+        n = matched = 0
+        with open(args.output, "w", newline="", encoding="utf-8") as fh:
+            writer = csv.DictWriter(fh, fieldnames=OUT_FIELDS)
+            writer.writeheader()
+            try:
+                for row in index.query(args.match, args.max_sentences, args.hits_only):
+                    writer.writerow(row)
+                    n += 1
+                    matched += row["export_hits"] > 0
+            except sqlite3.OperationalError as e:
+                raise SystemExit(f"[fatal] bad query {args.match!r}: {e}")
+        print(f"[query] {matched}/{n} projects match {args.match!r} ({time.perf_counter() - t0:.2f}s) -> {args.output}")
+    index.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Run-wide memo for per-string work, shared across projects.
+
+Disclosures repeat long strings: SPI boilerplate, environmental category
+text, sponsor descriptions reused by sibling projects. Results computed
+from such a string (its text, section slices, amount mentions, export
+sentences) are kept under (kind, blake2b of the string), so a repeated
+block is parsed and scanned once per run. Memory is bounded (--memo-mb,
+approximate) with least-recently-used eviction. Strings shorter than
+MIN_CHARS are cheaper to redo than to hash and are never memoized.
+
+The result for a kind must depend only on the string (and on whatever is
+folded into the kind, e.g. the text backend), and callers must not
+mutate what they get back.
+"""
+
+import hashlib, threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+MIN_CHARS = 256
+
+def _size(v: Any) -> int:
+    """Rough bytes held by a cached value."""
+    if isinstance(v, str):
+        return 49 + len(v)
+    if isinstance(v, (tuple, list)):
+        return 56 + 8 * len(v) + sum(_size(x) for x in v)
+    if isinstance(v, dict):
+        return 232 + sum(_size(x) for x in v.values())
+    return 32
+
+class Memo:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (value, size)
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, kind: str, s: str, compute: Callable[[], Any]) -> Any:
+        if len(s) < MIN_CHARS:
+            return compute()
+        key = (kind, hashlib.blake2b(s.encode("utf-8", "surrogatepass"), digest_size=16).digest())
+        with self._lock:
+            got = self._data.get(key)
+            if got is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return got[0]
+            self.misses += 1
+        value = compute()  # outside the lock; two threads may both compute a new block
+        size = _size(value) + 120
+        with self._lock:
+            if key not in self._data:
+                self._data[key] = (value, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes and self._data:
+                    _, (_, sz) = self._data.popitem(last=False)
+                    self.bytes -= sz
+                    self.evictions += 1
+        return value
+
+    def stats(self) -> str:
+        return (f"hits={self.hits} misses={self.misses} evicted={self.evictions} "
+                f"entries={len(self._data)} size={self.bytes / 1e6:.1f}MB")
+
+MEMO: Optional[Memo] = None
+
+def memoized(kind: str, s: str, compute: Callable[[], Any]) -> Any:
+    """compute(), or its earlier result for an identical string."""
+    return compute() if MEMO is None else MEMO.get(kind, s, compute)
+
+def add_memo_args(ap) -> None:
+    ap.add_argument("--memo-mb", type=float, default=128,
+                    help="memory for reusing results on repeated text blocks across projects (0 = off)")
+
+def configure_memo(args) -> Optional[Memo]:
+    global MEMO
+    MEMO = Memo(int(args.memo_mb * 1024**2)) if args.memo_mb > 0 else None
+    return MEMO
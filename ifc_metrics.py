@@ -0,0 +1,205 @@
+"""
+Per-stage timing and counters for the IFC disclosure scrapers.
+
+Code marks its stages with `with stage("api"): ...` and bumps counters with
+count("parses"); both are no-ops unless a RunMetrics is recording the
+current project. The record lives in a context variable, so it follows
+a project onto the threads ifc_common.fan_out starts for it. MeteredSession counts requests, bytes and retryable
+failures under the rate limiter, so every attempt is seen.
+
+Stages: api (JSON fetch), section (description search), pdf (PDF
+fallback incl. downloads), corpus, amounts (amount index and pickers),
+scan (export sentences).
+
+Outputs, all optional:
+  --metrics-columns     per-project timing/counter columns in the CSV
+  --progress-every S    a progress line with rate and ETA every S seconds
+  --metrics-json PATH   run summary: stage wall/CPU totals and percentiles,
+                        overall and by doc type and extraction method
+"""
+
+import contextvars, json, threading, time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from ifc_ratelimit import RETRY_STATUS
+
+STAGES = ["api", "section", "pdf", "corpus", "amounts", "scan"]
+METRIC_COLUMNS = ([f"t_{s}_ms" for s in ["total"] + STAGES] +
+                  ["cpu_ms", "requests", "retries", "bytes_downloaded", "html_parses"])
+METHODS = {
+    "json_payload(html_block)": "html_block", "json_payload(html_text)": "html_text",
+    "json_payload(raw)": "raw", "pdf_fallback": "pdf_fallback",
+}
+
+class ProjectMetrics:
+    __slots__ = ("wall", "cpu", "requests", "retries", "bytes", "parses", "_t0", "_c0", "total", "total_cpu", "lock")
+
+    def __init__(self):
+        self.wall: Dict[str, float] = {}
+        self.cpu: Dict[str, float] = {}
+        self.requests = self.retries = self.bytes = self.parses = 0
+        self._t0, self._c0 = time.perf_counter(), time.thread_time()
+        self.total = self.total_cpu = 0.0
+        self.lock = threading.Lock()  # a project may fan out onto several threads
+
+    def add(self, name: str, wall: float, cpu: float) -> None:
+        with self.lock:
+            self.wall[name] = self.wall.get(name, 0.0) + wall
+            self.cpu[name] = self.cpu.get(name, 0.0) + cpu
+
+    def finish(self) -> None:
+        self.total = time.perf_counter() - self._t0
+        self.total_cpu = time.thread_time() - self._c0
+
+    def columns(self) -> Dict[str, Any]:
+        row = {"t_total_ms": round(self.total * 1000, 1)}
+        for s in STAGES:
+            row[f"t_{s}_ms"] = round(self.wall.get(s, 0.0) * 1000, 1)
+        row.update(cpu_ms=round(self.total_cpu * 1000, 1), requests=self.requests, retries=self.retries,
+                   bytes_downloaded=self.bytes, html_parses=self.parses)
+        return row
+
+_current: contextvars.ContextVar = contextvars.ContextVar("ifc_metrics_project", default=None)
+
+def current() -> Optional[ProjectMetrics]:
+    return _current.get()
+
+@contextmanager
+def stage(name: str):
+    rec = current()
+    if rec is None:
+        yield
+        return
+    t, c = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        rec.add(name, time.perf_counter() - t, time.thread_time() - c)
+
+def count(field: str, n: int = 1) -> None:
+    rec = current()
+    if rec is not None:
+        with rec.lock:
+            setattr(rec, field, getattr(rec, field) + n)
+
+class MeteredSession:
+    """Counts requests, body bytes and retryable failures for the current project."""
+    def __init__(self, session):
+        self.session = session
+
+    def get(self, url: str, **kw):
+        count("requests")
+        try:
+            r = self.session.get(url, **kw)
+        except Exception:
+            count("retries")
+            raise
+        count("bytes", len(r.content or b""))
+        if r.status_code in RETRY_STATUS:
+            count("retries")
+        return r
+
+def _pct(xs: List[float], q: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))] if xs else 0.0
+
+class RunMetrics:
+    def __init__(self, total: int = 0, progress_every: float = 0.0, columns: bool = False):
+        self.total = total
+        self.progress_every = progress_every
+        self.with_columns = columns
+        self._lock = threading.Lock()
+        self._start = self._last_progress = time.monotonic()
+        self.done = 0
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.methods: Dict[str, int] = defaultdict(int)
+        # (group, stage) -> per-project wall / cpu seconds
+        self._wall: Dict[tuple, List[float]] = defaultdict(list)
+        self._cpu: Dict[tuple, List[float]] = defaultdict(list)
+
+    @contextmanager
+    def project(self):
+        """Record the stages run in this context until the block exits."""
+        rec = ProjectMetrics()
+        token = _current.set(rec)
+        try:
+            yield rec
+        finally:
+            _current.reset(token)
+            rec.finish()
+
+    def record(self, rec: ProjectMetrics, row: Dict[str, Any], doc_type: str = "") -> Dict[str, Any]:
+        """Fold one project into the run totals; returns the row, with metric columns if enabled."""
+        method = METHODS.get(row.get("extraction_method") or "", "none") if "extraction_method" in row else ""
+        groups = ["all"] + ([f"type:{doc_type}"] if doc_type else []) + ([f"method:{method}"] if method else [])
+        with self._lock:
+            for f in ("requests", "retries", "bytes", "parses"):
+                self.counters[f] += getattr(rec, f)
+            if str(row.get("fetch_status", "")).startswith("error"):
+                self.counters["errors"] += 1
+            if method:
+                self.methods[method] += 1
+            for g in groups:
+                self._wall[(g, "total")].append(rec.total)
+                self._cpu[(g, "total")].append(rec.total_cpu)
+                for s in STAGES:
+                    if s in rec.wall:
+                        self._wall[(g, s)].append(rec.wall[s])
+                        self._cpu[(g, s)].append(rec.cpu[s])
+        if self.with_columns:
+            row = dict(row, **rec.columns())
+        return row
+
+    def tick(self) -> None:
+        """Count one finished project; print a progress line when due."""
+        self.done += 1
+        now = time.monotonic()
+        if not self.progress_every or now - self._last_progress < self.progress_every:
+            return
+        self._last_progress = now
+        rate = self.done / max(now - self._start, 1e-9)
+        if self.total:
+            left = max(self.total - self.done, 0)
+            eta = time.strftime("%H:%M:%S", time.gmtime(left / rate)) if rate else "?"
+            print(f"[progress] {self.done}/{self.total} projects, {rate:.2f}/s, ETA {eta}", flush=True)
+        else:
+            print(f"[progress] {self.done} projects, {rate:.2f}/s", flush=True)
+
+    def line(self) -> str:
+        c = self.counters
+        tally = " ".join(f"{k}={v}" for k, v in sorted(self.methods.items()))
+        return (f"{self.done} projects in {time.monotonic() - self._start:.1f}s; requests={c['requests']} "
+                f"retries={c['retries']} bytes={c['bytes']} parses={c['parses']}" + (f"; {tally}" if tally else ""))
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self._start
+        out: Dict[str, Any] = {
+            "projects": self.done, "elapsed_s": round(elapsed, 2),
+            "projects_per_s": round(self.done / elapsed, 3) if elapsed else 0.0,
+            "counters": dict(self.counters), "extraction_methods": dict(self.methods), "stages": {},
+        }
+        for (group, s), walls in sorted(self._wall.items()):
+            cpus = self._cpu[(group, s)]
+            out["stages"].setdefault(group, {})[s] = {
+                "n": len(walls), "wall_s": round(sum(walls), 3), "cpu_s": round(sum(cpus), 3),
+                "p50_ms": round(_pct(walls, 0.5) * 1000, 1), "p95_ms": round(_pct(walls, 0.95) * 1000, 1),
+            }
+        return out
+
+    def write_summary(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.summary(), fh, indent=2)
+
+def add_metrics_args(ap) -> None:
+    ap.add_argument("--metrics-columns", action="store_true", help="add per-project timing/counter columns")
+    ap.add_argument("--progress-every", type=float, default=0, help="print rate and ETA every N seconds (0 = off)")
+    ap.add_argument("--metrics-json", default="", help="write a per-stage timing summary here at the end")
+
+def metrics_from_args(args, input_rows: Callable[[], Iterable] = None) -> Optional[RunMetrics]:
+    """None unless a metrics output was asked for; input_rows() is counted for the ETA."""
+    if not (args.metrics_columns or args.progress_every or args.metrics_json):
+        return None
+    total = sum(1 for _ in input_rows()) if args.progress_every and input_rows else 0
+    return RunMetrics(total, args.progress_every, args.metrics_columns)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Optional Parquet output for the dollar-value extractor (RowOut rows).
+
+Instead of one wide CSV with the amount mentions embedded as text and a
+JSON blob, two typed tables are written under --parquet-dir:
+
+  projects/part-NNNNN.parquet   one row per project (RowOut without
+                                all_amount_mentions / amounts_json)
+  mentions/part-NNNNN.parquet   one row per amount mention:
+                                project_id, url, seq, amount_usd, raw, offset
+
+`offset` is the character position of the mention in the text the amounts
+were read from (the description section, or the payload corpus when no
+section was found). Rows are buffered and each batch is written as its own
+complete part file, so an interrupted run loses at most one batch; read
+the directory as one dataset (pandas.read_parquet("dir/mentions")).
+
+Needs pyarrow (pip install pyarrow); the CSV output does not.
+
+Convert an existing extractor CSV:
+  python ifc_parquet.py out_ifc_sections_api.csv parquet_out/
+"""
+
+import argparse, csv, json, os, re, sys
+from typing import Any, Dict, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = pq = None
+
+INT_FIELDS = {"http_status", "sibling_http_status"}
+FLOAT_FIELDS = {"ifc_investment_usd", "facility_notional_usd"}
+MENTION_FIELDS = {"all_amount_mentions", "amounts_json"}
+PART_RE = re.compile(r"part-(\d{5})\.parquet$")
+
+def _parts(d: str) -> List[str]:
+    """This sink's part files in `d`, in write order; other files are left alone."""
+    return sorted(fn for fn in os.listdir(d) if PART_RE.match(fn))
+
+def _schemas(fieldnames: List[str]):
+    cols = []
+    for name in fieldnames:
+        if name in MENTION_FIELDS:
+            continue
+        typ = pa.int32() if name in INT_FIELDS else pa.float64() if name in FLOAT_FIELDS else pa.string()
+        cols.append(pa.field(name, typ))
+    projects = pa.schema(cols)
+    mentions = pa.schema([
+        pa.field("project_id", pa.string()), pa.field("url", pa.string()), pa.field("seq", pa.int32()),
+        pa.field("amount_usd", pa.float64()), pa.field("raw", pa.string()), pa.field("offset", pa.int64()),
+    ])
+    return projects, mentions
+
+def _num(v: Any, cast) -> Optional[Any]:
+    # rows come typed from the extractor, or as strings from a CSV
+    if v is None or v == "":
+        return None
+    try:
+        return cast(float(v)) if cast is int else cast(v)
+    except (TypeError, ValueError):
+        return None
+
+class ParquetSink:
+    def __init__(self, root: str, fieldnames: List[str], batch_rows: int = 500, resume: bool = False):
+        if pa is None:
+            raise SystemExit("[fatal] --parquet-dir needs pyarrow (pip install pyarrow)")
+        self.root = root
+        self.batch_rows = max(1, batch_rows)
+        self.project_schema, self.mention_schema = _schemas(fieldnames)
+        self._projects: List[Dict[str, Any]] = []
+        self._mentions: List[Dict[str, Any]] = []
+        for sub in ("projects", "mentions"):
+            d = os.path.join(root, sub)
+            os.makedirs(d, exist_ok=True)
+            if not resume:
+                for fn in os.listdir(d):
+                    if fn.startswith("part-") and fn.endswith(".parquet"):
+                        os.remove(os.path.join(d, fn))
+        # a resumed run appends new parts after the existing ones; a projects part whose
+        # mentions part was never written (crash between the two) is dropped and backfilled
+        parts = []
+        for fn in _parts(os.path.join(root, "projects")):
+            if os.path.exists(os.path.join(root, "mentions", fn)):
+                parts.append(fn)
+            else:
+                os.remove(os.path.join(root, "projects", fn))
+        self._part = int(PART_RE.match(parts[-1]).group(1)) + 1 if parts else 0
+        self.rows = self.mentions = 0
+
+    def write(self, row: Dict[str, Any]) -> None:
+        rec = {}
+        for f in self.project_schema.names:
+            v = row.get(f)
+            rec[f] = _num(v, int) if f in INT_FIELDS else _num(v, float) if f in FLOAT_FIELDS else \
+                ("" if v is None else str(v))
+        self._projects.append(rec)
+        try:
+            hits = json.loads(row.get("amounts_json") or "[]")
+        except ValueError:
+            hits = []
+        for seq, h in enumerate(hits):
+            self._mentions.append({
+                "project_id": rec["project_id"], "url": rec["url"], "seq": seq,
+                "amount_usd": _num(h.get("amount_usd"), float), "raw": h.get("raw", ""),
+                "offset": _num(h.get("offset"), int),  # absent in rows from before offsets were recorded
+            })
+        if len(self._projects) >= self.batch_rows:
+            self.flush()
+
+    def _write_part(self, sub: str, records: List[Dict[str, Any]], schema) -> None:
+        path = os.path.join(self.root, sub, f"part-{self._part:05d}.parquet")
+        pq.write_table(pa.Table.from_pylist(records, schema=schema), path + ".tmp", compression="zstd")
+        os.replace(path + ".tmp", path)
+
+    def flush(self) -> None:
+        if not self._projects:
+            return
+        self._write_part("projects", self._projects, self.project_schema)
+        self._write_part("mentions", self._mentions, self.mention_schema)
+        self.rows += len(self._projects)
+        self.mentions += len(self._mentions)
+        self._projects, self._mentions = [], []
+        self._part += 1
+
+    def backfill(self, csv_path: str) -> int:
+        """
+        For --resume: write the rows of the (already recovered) output CSV
+        that no Parquet part holds, i.e. the unflushed batch lost in a crash.
+        """
+        have = set()
+        d = os.path.join(self.root, "projects")
+        for fn in _parts(d):
+            have.update(pq.read_table(os.path.join(d, fn), columns=["url"]).column("url").to_pylist())
+        n = 0
+        csv.field_size_limit(sys.maxsize)  # section_text can be long
+        with open(csv_path, newline="", encoding="utf-8") as fh:
+            for row in csv.DictReader(fh):
+                if row.get("url") not in have:
+                    self.write(row)
+                    n += 1
+        self.flush()
+        return n
+
+    def close(self) -> None:
+        self.flush()
+
+def add_parquet_args(ap) -> None:
+    ap.add_argument("--parquet-dir", default="",
+                    help="also write typed projects/mentions Parquet tables here (needs pyarrow)")
+    ap.add_argument("--parquet-batch", type=int, default=500, help="projects per Parquet part file")
+
+def parquet_from_args(args, fieldnames: List[str]) -> Optional[ParquetSink]:
+    if not args.parquet_dir:
+        return None
+    return ParquetSink(args.parquet_dir, fieldnames, args.parquet_batch, resume=args.resume)
+
+def main():
+    ap = argparse.ArgumentParser(description="Convert an extractor output CSV to Parquet projects/mentions tables")
+    ap.add_argument("csv", help="output of ifc_disclosures_api_extractor_v4.py")
+    ap.add_argument("outdir")
+    ap.add_argument("--batch", type=int, default=5000)
+    args = ap.parse_args()
+
+    csv.field_size_limit(sys.maxsize)  # section_text can be long
+    with open(args.csv, newline="", encoding="utf-8") as fh:
+        reader = csv.DictReader(fh)
+        sink = ParquetSink(args.outdir, reader.fieldnames or [], args.batch)
+        for row in reader:
+            sink.write(row)
+    sink.close()
+    print(f"[parquet] {sink.rows} projects, {sink.mentions} mentions -> {args.outdir}")
+
+if __name__ == "__main__":
+    main()
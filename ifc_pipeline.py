@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Fetch each project's disclosure payloads once and run several analyzers
+over them in the same pass, one output CSV per analyzer.
+
+The dollar-value extractor (ifc_disclosures_api_extractor_v4.py) and the
+export scanner (ifc_find_exports_v1.py) read the same ProjectAccess JSON;
+run separately they download the portfolio twice. Here the union of the
+endpoints the active analyzers need is fetched once per project.
+
+Usage:
+  python -u ifc_pipeline.py \
+    --input "ifc_investment_services_projects_11-05-2025.csv" \
+    --out amounts=out_ifc_sections_api.csv \
+    --out exports=out_ifc_exports.csv \
+    --workers 8 --cache-dir cache/
+
+New analyzers subclass Analyzer and register in ANALYZERS.
+"""
+
+import argparse, csv
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+import ifc_disclosures_api_extractor_v4 as amounts_mod
+import ifc_find_exports_v1 as exports_mod
+from ifc_aggregate import add_aggregate_args, aggregate, need_pandas
+from ifc_cache import CachingSession, add_cache_args, cache_from_args
+from ifc_checkpoint import CheckpointWriter, add_resume_args
+from ifc_index import SentenceIndex, payload_sentences
+from ifc_memo import add_memo_args, configure_memo
+from ifc_parquet import add_parquet_args, parquet_from_args
+from ifc_ratelimit import add_rate_args, throttle_from_args
+from ifc_shard import add_shard_args, shard_from_args, shard_rows
+from ifc_state import (ConditionalSession, StateStore, add_state_args, body_digest, fingerprint,
+                       reuse_or_run, state_from_args)
+from ifc_taxonomy import add_taxonomy_args
+from ifc_text import BACKENDS, add_text_args, set_backend
+from ifc_common import (API_BASE, HostCappedSession, add_concurrency_args, fan_out, make_session, open_input_rows,
+                        parse_id_and_type, run_ordered)
+
+# --------------------------
+# Fetching
+# --------------------------
+@dataclass
+class Fetched:
+    status: Optional[int] = None
+    json: Any = None
+    ok: bool = False
+    error: Optional[Exception] = None
+    digest: Optional[str] = None  # sha256 of the body, for incremental refresh
+
+def fetch_endpoint(session, url: str, timeout: int = 30) -> Fetched:
+    """
+    GET a JSON endpoint once (retries live in ThrottledSession). The body
+    is parsed even when not OK, because the amount extractor reads error
+    payloads too.
+    """
+    out = Fetched()
+    try:
+        r = session.get(url, timeout=timeout)
+        out.status, out.ok = r.status_code, r.ok
+        out.digest = body_digest(r.content)
+        out.json = r.json()
+    except Exception as e:
+        out.error = e
+    return out
+
+@dataclass
+class Project:
+    url: str
+    name: str
+    project_id: Optional[str]
+    doc_type: Optional[str]
+    payloads: Dict[str, Fetched] = field(default_factory=dict)
+
+# --------------------------
+# Analyzers
+# --------------------------
+class Analyzer:
+    """One output table computed from a project's fetched payloads."""
+    name = ""
+    fieldnames: List[str] = []
+    reusable = True  # with --state, may carry the previous row forward when payloads are unchanged
+
+    def accepts(self, project: Project) -> bool:
+        return True
+
+    def endpoints(self, project: Project) -> List[str]:
+        return []
+
+    def fingerprint_endpoints(self, project: Project) -> List[str]:
+        """Endpoints whose bytes decide the row, for --state; fetched up front as well."""
+        return self.endpoints(project)
+
+    def global_endpoints(self) -> List[str]:
+        """Project-independent endpoints; fetched once per run, not per project."""
+        return []
+
+    def analyze_globals(self, fetched: Dict[str, Fetched]) -> List[Dict[str, Any]]:
+        return []
+
+    def analyze(self, session, project: Project) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def error_row(self, project: Project, e: Exception) -> Dict[str, Any]:
+        raise NotImplementedError
+
+class AmountAnalyzer(Analyzer):
+    """Description section + IFC investment / facility amounts (RowOut)."""
+    name = "amounts"
+    fieldnames = amounts_mod.OUT_HEADER
+
+    def endpoints(self, project):
+        if project.project_id and project.doc_type in ("SPI", "SII"):
+            return amounts_mod.project_endpoints(project.project_id, project.doc_type)
+        return []
+
+    def fingerprint_endpoints(self, project):
+        if project.project_id and project.doc_type in ("SPI", "SII"):
+            return amounts_mod.project_endpoints(project.project_id, project.doc_type, fingerprinted=True)
+        return []
+
+    def analyze(self, session, project):
+        pid, doc_type, url, name = project.project_id, project.doc_type, project.url, project.name
+        if not pid or doc_type not in ("SPI", "SII"):
+            return asdict(amounts_mod.fetch_one(session, url, name))  # bad-URL row, no request made
+        eps = self.endpoints(project)
+        got = project.payloads[eps[0]]
+        if got.error is not None:
+            return asdict(amounts_mod.api_error_row(pid, name, url, eps[0], got.error))
+        # the sibling, if already fetched (--sibling parallel, --state, or another analyzer's endpoint)
+        sib_ep = amounts_mod.project_api_url(amounts_mod.SIBLING[doc_type], pid)
+        sib = project.payloads.get(sib_ep)
+        sibling = (sib_ep, sib.status, sib.json, sib.error) if sib is not None else None
+        return asdict(amounts_mod.analyze_payload(session, pid, name, url, eps[0], got.status, got.json,
+                                                  sibling=sibling))
+
+    def error_row(self, project, e):
+        return asdict(amounts_mod.error_row(project.url, project.name, e))
+
+class ExportAnalyzer(Analyzer):
+    """Sentences mentioning export* across the project's endpoints (OutRow)."""
+    name = "exports"
+    fieldnames = exports_mod.OUT_FIELDS
+
+    def accepts(self, project):
+        return project.url.startswith("http")
+
+    def endpoints(self, project):
+        return exports_mod.export_endpoints(project.project_id) if project.project_id else []
+
+    def global_endpoints(self):
+        return exports_mod.global_endpoints()
+
+    def analyze_globals(self, fetched):
+        got = [(ep, f.json if f.ok else None, f.status) for ep, f in fetched.items()]
+        return [asdict(r) for r in exports_mod.scan_global_payloads(got)]
+
+    def analyze(self, session, project):
+        if not project.project_id:
+            return asdict(exports_mod.OutRow("", project.name, project.url, None, "error:bad_url", "", 0, "", 0))
+        fetched = []
+        for ep in self.endpoints(project):
+            got = project.payloads[ep]
+            fetched.append((ep, got.json if got.ok else None, got.status))
+        return asdict(exports_mod.scan_payloads(project.project_id, project.name, project.url, fetched))
+
+    def error_row(self, project, e):
+        return asdict(exports_mod.error_row(project.url, project.name, e))
+
+class IndexAnalyzer(ExportAnalyzer):
+    """Every sentence of the export scanner's payloads, for the --index sentence store (ifc_index.py)."""
+    name = "index"
+    fieldnames: List[str] = []
+    reusable = False  # the index skips unchanged projects itself
+
+    def __init__(self, index: SentenceIndex):
+        self.index = index
+
+    def analyze(self, session, project):
+        eps = self.endpoints(project)
+        fp = fingerprint((ep, project.payloads[ep].status, project.payloads[ep].digest) for ep in eps)
+        row = {"project_id": project.project_id or "", "project_name": project.name, "url": project.url,
+               "fingerprint": fp, "sentences": None}
+        if fp and fp == self.index.fingerprint(project.url):
+            return row
+        fetched = [(ep, project.payloads[ep].json if project.payloads[ep].ok else None, project.payloads[ep].status)
+                   for ep in eps]
+        statuses = [st for _, _, st in fetched if st is not None]
+        row["sentences"], row["chars"] = payload_sentences(fetched)
+        row["http_status"] = statuses[-1] if statuses else None
+        row["endpoints"] = " | ".join(ep for ep, j, _ in fetched if j is not None)
+        return row
+
+    def error_row(self, project, e):
+        print(f"[index] {project.url}: {type(e).__name__}: {e}")
+        return {"url": project.url, "sentences": None}
+
+ANALYZERS = {cls.name: cls for cls in (AmountAnalyzer, ExportAnalyzer)}
+
+# --------------------------
+# Pipeline
+# --------------------------
+def run_analyzer(session, a: Analyzer, project: Project) -> Dict[str, Any]:
+    try:
+        return a.analyze(session, project)
+    except Exception as e:
+        return a.error_row(project, e)
+
+def process_project(session, url: str, name: str, analyzers: List[Analyzer],
+                    state: Optional[StateStore] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch every endpoint the analyzers need once (concurrently), then run each analyzer.
+    With a state store, an analyzer whose endpoints are byte-identical to
+    the last run reuses its previous row instead.
+    """
+    pid, doc_type = parse_id_and_type(url)
+    project = Project(url, name, pid, doc_type)
+    active = [a for a in analyzers if a.accepts(project)]
+    eps = list(dict.fromkeys(ep for a in active
+                             for ep in (a.endpoints(project) if state is None else a.fingerprint_endpoints(project))))
+    project.payloads.update(zip(eps, fan_out(lambda ep: fetch_endpoint(session, ep), eps)))
+    rows = {}
+    for a in active:
+        if state is None or not a.reusable:
+            rows[a.name] = run_analyzer(session, a, project)
+            continue
+        fp = fingerprint((ep, project.payloads[ep].status, project.payloads[ep].digest)
+                         for ep in a.fingerprint_endpoints(project))
+        rows[a.name] = reuse_or_run(state, a.name, url, fp, lambda: run_analyzer(session, a, project))
+    return rows
+
+def write_globals(session, analyzers: List[Analyzer], outs: Dict[str, str]) -> None:
+    """Fetch each analyzer's global endpoints once and write their rows to a separate CSV."""
+    fetched: Dict[str, Fetched] = {}
+    for a in analyzers:
+        if a.name not in outs:
+            continue
+        eps = a.global_endpoints()
+        for ep in eps:
+            if ep not in fetched:
+                fetched[ep] = fetch_endpoint(session, ep)
+        with open(outs[a.name], "w", newline="", encoding="utf-8") as fh:
+            writer = csv.DictWriter(fh, fieldnames=a.fieldnames)
+            writer.writeheader()
+            for row in a.analyze_globals({ep: fetched[ep] for ep in eps}):
+                writer.writerow(row)
+        print(f"[global] {a.name}: wrote {outs[a.name]}")
+
+def parse_out_specs(specs: List[str]) -> Dict[str, str]:
+    outs = {}
+    for spec in specs:
+        name, sep, path = spec.partition("=")
+        if not sep or name not in ANALYZERS:
+            raise SystemExit(f"[fatal] --out expects NAME=PATH with NAME in {sorted(ANALYZERS)}; got {spec!r}")
+        outs[name] = path
+    return outs
+
+def main():
+    ap = argparse.ArgumentParser(description="Fetch IFC disclosures once; run several analyzers")
+    ap.add_argument("--input", required=True, help="CSV/TSV with at least the disclosure URL")
+    ap.add_argument("--out", action="append", default=[], metavar="NAME=PATH",
+                    help=f"analyzer output; repeatable. NAME in {sorted(ANALYZERS)}")
+    ap.add_argument("--global-out", action="append", default=[], metavar="NAME=PATH",
+                    help="write an analyzer's project-independent endpoint hits here (fetched once)")
+    ap.add_argument("--url-col", default="Project Url")
+    ap.add_argument("--name-col", default="Project Name")
+    ap.add_argument("--max-rows", type=int, default=0)
+    add_concurrency_args(ap)
+    add_rate_args(ap)
+    amounts_mod.add_pdf_args(ap)
+    amounts_mod.add_sibling_args(ap)
+    add_cache_args(ap)
+    add_resume_args(ap)
+    add_state_args(ap)
+    add_shard_args(ap)
+    add_parquet_args(ap)
+    ap.add_argument("--index", default="", metavar="PATH",
+                    help="also store every payload sentence in this SQLite full-text index (query with ifc_index.py)")
+    add_text_args(ap)
+    ap.add_argument("--export-text-backend", choices=sorted(BACKENDS), default="bs4",
+                    help="text backend for the exports analyzer (bs4 = html.parser, as the standalone scanner)")
+    add_taxonomy_args(ap)
+    add_memo_args(ap)
+    add_aggregate_args(ap)
+    args = ap.parse_args()
+    set_backend(args.text_backend)
+    exports_mod.configure_text(args.export_text_backend)
+    exports_mod.configure_taxonomy(args.taxonomy)
+    outs = parse_out_specs(args.out)
+    global_outs = parse_out_specs(args.global_out)
+    for name in global_outs:
+        if name not in outs:
+            raise SystemExit(f"[fatal] --global-out {name}=... needs --out {name}=PATH (it runs that analyzer)")
+        if not ANALYZERS[name]().global_endpoints():
+            raise SystemExit(f"[fatal] --global-out: the {name} analyzer has no global endpoints")
+    if not outs and not args.index:
+        raise SystemExit("[fatal] nothing to do: give --out NAME=PATH and/or --index PATH")
+    if args.parquet_dir and "amounts" not in outs:
+        raise SystemExit("[fatal] --parquet-dir writes the amounts table; add --out amounts=PATH")
+    if args.aggregate_dir:
+        if "amounts" not in outs:
+            raise SystemExit("[fatal] --aggregate-dir reads the amounts table; add --out amounts=PATH")
+        need_pandas()
+    cache = cache_from_args(args)
+    state = state_from_args(args)
+    sink = parquet_from_args(args, AmountAnalyzer.fieldnames)
+    amounts_mod.configure_pdf(args)
+    amounts_mod.configure_sibling(args)
+    memo = configure_memo(args)
+
+    shard = shard_from_args(args)
+    rows = shard_rows(open_input_rows(args.input, args.url_col, args.name_col, args.max_rows), shard)
+
+    analyzers = [ANALYZERS[name]() for name in outs]
+    writers = {a.name: CheckpointWriter(outs[a.name], a.fieldnames, resume=args.resume) for a in analyzers}
+    if args.index:
+        index = SentenceIndex(args.index, resume=args.resume)
+        analyzers.append(IndexAnalyzer(index))
+        writers["index"] = index
+    if sink and writers["amounts"].resumed:
+        print(f"[parquet] backfilled {sink.backfill(outs['amounts'])} rows missing from {args.parquet_dir}")
+    for name, w in writers.items():
+        if w.resumed:
+            print(f"[resume] {name}: {w.resumed} projects already in {args.index if name == 'index' else outs[name]}")
+
+    def work(r):
+        url, name = r
+        todo = [a for a in analyzers if url not in writers[a.name].done]
+        return url, process_project(session, url, name, todo, state)
+
+    completed = False
+    try:
+        with make_session(args.workers) as s:
+            session = throttled = throttle_from_args(HostCappedSession(s, args.per_host), args)
+            if state:
+                session = ConditionalSession(session, state)
+            if cache:
+                session = CachingSession(session, cache, offline=args.offline, bypass=API_BASE if state else None)
+            if global_outs:
+                write_globals(session, analyzers, global_outs)
+            todo = (r for r in rows if any(r[0] not in w.done for w in writers.values()))
+            for i, (url, results) in enumerate(run_ordered(work, todo, args.workers), 1):
+                for name, row in results.items():
+                    writers[name].writerow(row)
+                    if sink and name == "amounts":
+                        sink.write(row)
+                print(f"[{i}] {url}")
+        completed = True
+        print(f"[rate] {throttled.limiter.stats()}")
+        if memo is not None:
+            print(f"[memo] {memo.stats()}")
+    finally:
+        if args.index:
+            print(f"[index] {index.indexed} projects indexed, {index.unchanged} unchanged; {index.stats()}")
+        for w in writers.values():
+            w.close(completed=completed)
+        if sink:
+            sink.close()
+            print(f"[parquet] {sink.rows} projects, {sink.mentions} mentions -> {args.parquet_dir}")
+        amounts_mod.close_pdf()
+        if cache:
+            print(f"[cache] {cache.stats()}")
+            cache.close()
+        if state:
+            print(f"[incremental] {state.stats()}")
+            state.close()
+    print(f"[done] wrote: {', '.join(list(outs.values()) + ([args.index] if args.index else []))}")
+    if args.aggregate_dir:
+        tables = aggregate(args.input, [outs["amounts"]], outs.get("exports"), args.aggregate_dir, args.countries)
+        print(f"[aggregate] wrote: {', '.join(tables)}")
+
+if __name__ == "__main__":
+    main()
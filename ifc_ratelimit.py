@@ -0,0 +1,154 @@
+"""
+Adaptive request pacing and retries for the IFC disclosure service.
+
+AdaptiveRateLimiter is a token bucket shared by all worker threads. Its rate
+adapts AIMD-style: every successful response adds `increase` req/s (up to
+max_rate); a 429/503, other 5xx or connection failure multiplies the rate by
+`decrease` (at most once per cooldown, so one burst of errors counts once).
+A Retry-After header pauses the whole bucket until that time.
+
+ThrottledSession wraps anything with a requests-style .get(): each attempt
+takes a token, and 429/5xx/connection errors are retried with exponential
+backoff and full jitter (or the server's Retry-After, if longer).
+
+Counters (limiter.stats()) are printed at the end of a run so the request
+rate can be tuned against what the service actually tolerates.
+"""
+
+import email.utils, random, threading, time
+from typing import Dict, Optional
+
+import requests
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+THROTTLE_STATUS = {429, 503}
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After as seconds from now; accepts delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        dt = email.utils.parsedate_to_datetime(value)
+        return max(0.0, dt.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate: float = 4.0, max_rate: float = 10.0, min_rate: float = 0.2,
+                 burst: float = 4.0, increase: float = 0.05, decrease: float = 0.5, cooldown: float = 2.0):
+        self.rate = rate
+        self.max_rate, self.min_rate = max_rate, min_rate
+        self.burst = burst
+        self.increase, self.decrease, self.cooldown = increase, decrease, cooldown
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._last_cut = 0.0
+        self._lock = threading.Lock()
+        self.counters: Dict[str, float] = {
+            "requests": 0, "ok": 0, "throttled": 0, "server_errors": 0, "conn_errors": 0,
+            "retries": 0, "gave_up": 0, "rate_cuts": 0, "wait_s": 0.0,
+        }
+
+    def acquire(self) -> None:
+        """Block until a request may be sent. Tokens are reserved, so waiters queue fairly."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            wait = max(-self._tokens / self.rate if self._tokens < 0 else 0.0, self._paused_until - now)
+            self.counters["requests"] += 1
+            self.counters["wait_s"] += wait
+        if wait > 0:
+            time.sleep(wait)
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.counters[key] += 1
+
+    def _cut(self, now: float) -> None:
+        if now - self._last_cut >= self.cooldown:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._last_cut = now
+            self.counters["rate_cuts"] += 1
+
+    def feedback(self, status: Optional[int], retry_after: Optional[float] = None) -> None:
+        """Adapt to one response (status None = connection error / timeout)."""
+        with self._lock:
+            now = time.monotonic()
+            if status is None:
+                self.counters["conn_errors"] += 1
+                self._cut(now)
+            elif status in THROTTLE_STATUS:
+                self.counters["throttled"] += 1
+                self._cut(now)
+            elif status >= 500:
+                self.counters["server_errors"] += 1
+                self._cut(now)
+            else:
+                self.counters["ok"] += 1
+                self.rate = min(self.max_rate, self.rate + self.increase)
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+    def stats(self) -> str:
+        c = self.counters
+        return (f"requests={int(c['requests'])} ok={int(c['ok'])} throttled={int(c['throttled'])} "
+                f"5xx={int(c['server_errors'])} conn_err={int(c['conn_errors'])} retries={int(c['retries'])} "
+                f"gave_up={int(c['gave_up'])} rate_cuts={int(c['rate_cuts'])} waited={c['wait_s']:.1f}s "
+                f"rate_now={self.rate:.2f}/s")
+
+class ThrottledSession:
+    """Rate-limited .get() with exponential-backoff retries on 429/5xx/connection errors."""
+    def __init__(self, session, limiter: AdaptiveRateLimiter, max_attempts: int = 4,
+                 backoff_base: float = 0.5, backoff_cap: float = 60.0):
+        self.session = session
+        self.limiter = limiter
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base, self.backoff_cap = backoff_base, backoff_cap
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        # full jitter: uniform in [0, base * 2^attempt], capped
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
+
+    def get(self, url: str, **kw):
+        for attempt in range(self.max_attempts):
+            last = attempt + 1 == self.max_attempts
+            self.limiter.acquire()
+            try:
+                r = self.session.get(url, **kw)
+            except (requests.ConnectionError, requests.Timeout):
+                self.limiter.feedback(None)
+                if last:
+                    self.limiter.count("gave_up")
+                    raise
+                self.limiter.count("retries")
+                time.sleep(self._backoff(attempt, None))
+                continue
+            retry_after = parse_retry_after(r.headers.get("Retry-After")) if r.status_code in RETRY_STATUS else None
+            self.limiter.feedback(r.status_code, retry_after)
+            if r.status_code not in RETRY_STATUS:
+                return r
+            if last:
+                self.limiter.count("gave_up")
+                return r
+            self.limiter.count("retries")
+            time.sleep(self._backoff(attempt, retry_after))
+        return r
+
+def add_rate_args(ap) -> None:
+    ap.add_argument("--rate", type=float, default=4.0, help="starting request rate (req/s), adapted to 429/5xx")
+    ap.add_argument("--max-rate", type=float, default=10.0, help="ceiling for the adaptive request rate")
+    ap.add_argument("--max-attempts", type=int, default=4, help="tries per request on 429/5xx/connection errors")
+
+def throttle_from_args(session, args) -> ThrottledSession:
+    limiter = AdaptiveRateLimiter(rate=min(args.rate, args.max_rate), max_rate=args.max_rate,
+                                  burst=max(1.0, args.rate))
+    return ThrottledSession(session, limiter, max_attempts=args.max_attempts)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Split a scrape across machines or processes, then put it back together.
+
+`--shard i/N` (0 <= i < N) on either scraper or the pipeline keeps only the
+projects whose project id hashes to shard i, so N runs over the same
+input cover every project exactly once. The hash is sha1 of the project
+id, so the split is balanced and the same on every machine and Python
+version. Rows without a parseable id are sharded by their URL.
+
+Each shard writes its own outputs (and cache/state files, if used). Note
+that --rate applies per process: N shards hit the API N times as fast.
+
+Merge the shard outputs back into input order, reporting input projects
+missing from every shard and projects written more than once:
+  python ifc_shard.py --input projects.csv --output amounts.csv amounts.*.csv
+  python ifc_shard.py --input projects.csv --output parquet/ --parquet parquet.*/
+"""
+
+import argparse, csv, hashlib, os, sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ifc_common import open_input_rows, parse_id_and_type
+
+Shard = Tuple[int, int]
+
+def parse_shard(spec: str) -> Shard:
+    try:
+        i, n = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise SystemExit(f"[fatal] --shard wants i/N, got {spec!r}")
+    if n < 1 or not 0 <= i < n:
+        raise SystemExit(f"[fatal] --shard {spec}: need 0 <= i < N")
+    return i, n
+
+def shard_of(url: str, n: int) -> int:
+    pid, _ = parse_id_and_type(url)
+    key = (pid or url).encode("utf-8")
+    return int.from_bytes(hashlib.sha1(key).digest()[:8], "big") % n
+
+def shard_rows(rows: Iterable[Tuple[str, str]], shard: Optional[Shard]) -> Iterable[Tuple[str, str]]:
+    """The (url, name) rows that belong to this shard (all of them if shard is None)."""
+    if shard is None:
+        return rows
+    i, n = shard
+    return (r for r in rows if shard_of(r[0], n) == i)
+
+def add_shard_args(ap) -> None:
+    ap.add_argument("--shard", default="", metavar="i/N",
+                    help="process only shard i of N (0-based), split by a stable hash of the project id")
+
+def shard_from_args(args) -> Optional[Shard]:
+    return parse_shard(args.shard) if args.shard else None
+
+# --------------------------
+# Merge
+# --------------------------
+class MergeReport:
+    def __init__(self):
+        self.rows = 0
+        self.missing: List[str] = []
+        self.duplicated: Dict[str, int] = {}
+        self.extra: List[str] = []
+
+    def print(self, show: int = 10) -> None:
+        print(f"[merge] {self.rows} rows; missing={len(self.missing)} duplicated={len(self.duplicated)} "
+              f"not_in_input={len(self.extra)}")
+        for url in self.missing[:show]:
+            print(f"  missing: {url}")
+        for url, k in list(self.duplicated.items())[:show]:
+            print(f"  duplicated x{k}: {url}")
+        for url in self.extra[:show]:
+            print(f"  not in input: {url}")
+
+    @property
+    def clean(self) -> bool:
+        return not (self.missing or self.duplicated)
+
+def input_urls(path: str, url_col: str, name_col: str) -> List[str]:
+    seen, out = set(), []
+    for url, _ in open_input_rows(path, url_col, name_col, warn=False):
+        if url not in seen:
+            seen.add(url)
+            out.append(url)
+    return out
+
+def merge_order(order: List[str], keys: Iterable[Tuple[str, int]], report: MergeReport) -> List[int]:
+    """
+    Pick one record per URL (the first seen) and return the picked indexes in
+    input order, then any URLs the input does not list, in shard order.
+    `keys` yields (url, record index).
+    """
+    first: Dict[str, int] = {}
+    for url, idx in keys:
+        if url in first:
+            report.duplicated[url] = report.duplicated.get(url, 1) + 1
+        else:
+            first[url] = idx
+    picked = []
+    for url in order:
+        if url in first:
+            picked.append(first.pop(url))
+        else:
+            report.missing.append(url)
+    report.extra = list(first)
+    picked.extend(first.values())
+    report.rows = len(picked)
+    return picked
+
+def merge_csv(order: List[str], shards: List[str], output: str, key: str = "url") -> MergeReport:
+    csv.field_size_limit(sys.maxsize)  # section_text can be long
+    fieldnames, rows = None, []
+    for path in shards:
+        with open(path, newline="", encoding="utf-8") as fh:
+            reader = csv.DictReader(fh)
+            if fieldnames is None:
+                fieldnames = reader.fieldnames
+            elif reader.fieldnames != fieldnames:
+                raise SystemExit(f"[fatal] {path} has different columns from {shards[0]}")
+            rows.extend(reader)
+    report = MergeReport()
+    picked = merge_order(order, ((r[key], i) for i, r in enumerate(rows)), report)
+    tmp = output + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as fh:
+        w = csv.DictWriter(fh, fieldnames=fieldnames or [])
+        w.writeheader()
+        for i in picked:
+            w.writerow(rows[i])
+    os.replace(tmp, output)
+    return report
+
+def merge_parquet(order: List[str], shards: List[str], output: str) -> MergeReport:
+    from ifc_parquet import pa, pq
+    if pa is None:
+        raise SystemExit("[fatal] --parquet needs pyarrow (pip install pyarrow)")
+    tables: Dict[str, list] = {"projects": [], "mentions": []}
+    owner: Dict[str, List[int]] = {"projects": [], "mentions": []}  # shard number of each row
+    for k, d in enumerate(shards):
+        for sub in tables:
+            t = pq.read_table(os.path.join(d, sub))
+            tables[sub].append(t)
+            owner[sub].extend([k] * t.num_rows)
+    projects, mentions = (pa.concat_tables(tables[sub]) for sub in ("projects", "mentions"))
+
+    report = MergeReport()
+    urls = projects.column("url").to_pylist()
+    picked = merge_order(order, ((u, i) for i, u in enumerate(urls)), report)
+    # mentions follow their project; a duplicated project keeps the picked copy's mentions only
+    rank = {(urls[i], owner["projects"][i]): r for r, i in enumerate(picked)}
+    m_keys = zip(mentions.column("url").to_pylist(), owner["mentions"], mentions.column("seq").to_pylist())
+    m_picked = [j for _, _, j in sorted((rank[(u, k)], seq, j) for j, (u, k, seq) in enumerate(m_keys)
+                                        if (u, k) in rank)]
+
+    for sub, table, idx in (("projects", projects, picked), ("mentions", mentions, m_picked)):
+        d = os.path.join(output, sub)
+        os.makedirs(d, exist_ok=True)
+        for fn in os.listdir(d):
+            if fn.startswith("part-") and fn.endswith(".parquet"):
+                os.remove(os.path.join(d, fn))
+        path = os.path.join(d, "part-00000.parquet")
+        pq.write_table(table.take(pa.array(idx, type=pa.int64())), path + ".tmp", compression="zstd")
+        os.replace(path + ".tmp", path)
+    return report
+
+def main():
+    ap = argparse.ArgumentParser(description="Merge shard outputs back into input order")
+    ap.add_argument("--input", required=True, help="the CSV/TSV the shards were run on")
+    ap.add_argument("--output", required=True, help="merged CSV, or directory with --parquet")
+    ap.add_argument("shards", nargs="+", help="shard output CSVs (or --parquet-dir directories)")
+    ap.add_argument("--parquet", action="store_true", help="the shards are extractor --parquet-dir directories")
+    ap.add_argument("--url-col", default="Project Url")
+    ap.add_argument("--name-col", default="Project Name")
+    ap.add_argument("--strict", action="store_true", help="exit 1 if any project is missing or duplicated")
+    args = ap.parse_args()
+
+    order = input_urls(args.input, args.url_col, args.name_col)
+    if args.parquet:
+        report = merge_parquet(order, args.shards, args.output)
+    else:
+        report = merge_csv(order, args.shards, args.output)
+    report.print()
+    print(f"[done] wrote: {args.output}")
+    if args.strict and not report.clean:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
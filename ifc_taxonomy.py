@@ -0,0 +1,145 @@
+"""
+Categorized export-discipline signals, matched in one pass per sentence.
+
+A taxonomy maps categories to terms. A term is a word or phrase, matched
+case-insensitively on word boundaries; a trailing * also matches longer
+words ("export*" = export, exports, exporter...). All terms of all
+categories are compiled into one Aho-Corasick automaton, so each sentence
+is read once however long the term list grows.
+
+Config is JSON, {"category": ["term", ...], ...}; --taxonomy default uses
+DEFAULT_TAXONOMY below.
+"""
+
+import json
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+DEFAULT_TAXONOMY: Dict[str, List[str]] = {
+    "export_markets": [
+        "export*", "overseas market*", "international market*", "foreign market*", "global market*",
+        "regional market*", "sold abroad", "sales abroad", "foreign buyer*", "international buyer*",
+        "international customer*", "offtake agreement*", "off-take agreement*",
+    ],
+    "fx_earnings": [
+        "foreign exchange earning*", "foreign-exchange earning*", "fx earning*", "hard currency",
+        "hard-currency", "foreign currency earning*", "foreign currency revenue*", "dollar-denominated revenue*",
+        "usd-denominated revenue*", "natural hedge",
+    ],
+    "import_substitution": [
+        "import substitut*", "substitute import*", "substituting import*", "replace import*",
+        "replacing import*", "reduce import*", "reducing import*", "dependence on import*",
+        "reliance on import*", "imported product*", "currently imported",
+    ],
+    "domestic_market": [
+        "domestic market*", "local market*", "domestic demand", "local demand", "domestic consumption",
+        "local consumption", "domestic sales", "domestic customer*", "local customer*", "home market",
+    ],
+    "local_content": [
+        "local content", "local sourcing", "locally sourced", "local supplier*", "local procurement",
+        "smallholder*", "outgrower*", "value chain*", "supply chain*",
+    ],
+}
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+class AhoCorasick:
+    """Multi-pattern automaton over characters; search() yields (end index, pattern id)."""
+    def __init__(self, patterns: List[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.out: List[Tuple[int, ...]] = [()]
+        for pid, p in enumerate(patterns):
+            node = 0
+            for ch in p:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.out.append(())
+                node = nxt
+            self.out[node] += (pid,)
+        # breadth-first failure links; outputs of the fallback state are merged in
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] += self.out[self.fail[nxt]]
+
+    def search(self, text: str) -> Iterator[Tuple[int, int]]:
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                for pid in out[node]:
+                    yield i, pid
+
+class Taxonomy:
+    def __init__(self, categories: Dict[str, List[str]]):
+        self.categories = list(categories)
+        patterns: List[str] = []
+        self._terms: List[Tuple[int, int, bool]] = []  # (category index, length, prefix match)
+        for ci, cat in enumerate(self.categories):
+            for term in categories[cat]:
+                prefix = term.endswith("*")
+                t = " ".join(term.rstrip("*").lower().split())
+                if t:
+                    patterns.append(t)
+                    self._terms.append((ci, len(t), prefix))
+        self.automaton = AhoCorasick(patterns)
+        self.size = len(patterns)
+
+    def match(self, sentence: str) -> Set[int]:
+        """Indexes of the categories with at least one term in the sentence."""
+        low = sentence.lower()
+        n = len(low)
+        found: Set[int] = set()
+        for end, pid in self.automaton.search(low):
+            ci, length, prefix = self._terms[pid]
+            if ci in found:
+                continue
+            start = end - length + 1
+            if start > 0 and _is_word(low[start - 1]):
+                continue
+            if not prefix and end + 1 < n and _is_word(low[end + 1]):
+                continue
+            found.add(ci)
+        return found
+
+    def scan(self, sentences: Iterable[str], max_sentences: int = 24) -> Tuple[Dict[str, int], Dict[str, List[str]]]:
+        """Per category: sentences with a hit (count, and the first max_sentences of them)."""
+        hits = [0] * len(self.categories)
+        kept: List[List[str]] = [[] for _ in self.categories]
+        for s in sentences:
+            for ci in self.match(s):
+                hits[ci] += 1
+                if len(kept[ci]) < max_sentences:
+                    kept[ci].append(s)
+        counts = dict(zip(self.categories, hits))
+        return counts, {c: k for c, k in zip(self.categories, kept) if k}
+
+def load_taxonomy(spec: str) -> Optional[Taxonomy]:
+    """'' = off, 'default' = DEFAULT_TAXONOMY, else a JSON file of {category: [terms]}."""
+    if not spec:
+        return None
+    if spec == "default":
+        return Taxonomy(DEFAULT_TAXONOMY)
+    with open(spec, encoding="utf-8") as fh:
+        cfg = json.load(fh)
+    if not isinstance(cfg, dict) or not all(isinstance(v, list) for v in cfg.values()):
+        raise SystemExit(f"[fatal] {spec}: taxonomy must be a JSON object of category -> list of terms")
+    return Taxonomy(cfg)
+
+def add_taxonomy_args(ap) -> None:
+    ap.add_argument("--taxonomy", default="", metavar="default|PATH",
+                    help="also count categorized signals (JSON {category: [terms]}; 'default' = built-in)")
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Pluggable HTML-to-text backends for the IFC disclosure scrapers.
+
+  bs4         BeautifulSoup(raw, "lxml") -- the reference behaviour
+  lxml        lxml's C HTML parser driven through a parser target that
+              rebuilds the same strings bs4 would: same libxml2 events,
+              same merging of adjacent data, comments/PIs/doctype and
+              script/style/template/rt/rp text excluded from get_text.
+              parse() returns a small tree with the bs4 API the section
+              finder uses (find_all, get_text, next_siblings, .name).
+  selectolax  optional (pip install selectolax); text only, different
+              (HTML5) tree builder, so check it before relying on it.
+
+Select with --text-backend. The extractor defaults to lxml, which falls
+back to bs4 for any document it cannot parse. The export scanner keeps
+bs4 with html.parser by default, because libxml2 and html.parser disagree
+on malformed markup; its other backends are opt-in.
+
+Equivalence check over a sample of live (or cached) payloads:
+  python ifc_text.py --input projects.csv --backend lxml --sample 200 --cache-dir cache/
+"""
+
+import argparse, time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as _SelectolaxParser
+except ImportError:  # optional dependency
+    _SelectolaxParser = None
+
+# bs4's HTMLTreeBuilder.DEFAULT_STRING_CONTAINERS: text inside these tags
+# gets its own string class and is skipped by get_text() elsewhere.
+STRING_CONTAINERS = {"rt", "rp", "style", "script", "template"}
+TEXT = "text"
+
+# --------------------------
+# lxml backend: a bs4-shaped tree from parser-target events
+# --------------------------
+class TextNode(str):
+    """A string node; `kind` is "text", a container tag name, "comment", "pi" or "doctype"."""
+    name = None
+
+    def __new__(cls, value: str, kind: str):
+        s = super().__new__(cls, value)
+        s.kind = kind
+        return s
+
+class Node:
+    __slots__ = ("name", "parent", "contents", "index")
+
+    def __init__(self, name: str, parent: Optional["Node"] = None):
+        self.name = name
+        self.parent = parent
+        self.contents: List = []
+        self.index = 0
+
+    def append(self, child) -> None:
+        if isinstance(child, Node):
+            child.index = len(self.contents)
+        self.contents.append(child)
+
+    def descendants(self) -> Iterator:
+        stack = [iter(self.contents)]
+        while stack:
+            for child in stack[-1]:
+                yield child
+                if isinstance(child, Node):
+                    stack.append(iter(child.contents))
+                break
+            else:
+                stack.pop()
+
+    def find_all(self, names: List[str]) -> List["Node"]:
+        wanted = set(names)
+        return [d for d in self.descendants() if isinstance(d, Node) and d.name in wanted]
+
+    def get_text(self, separator: str = "", strip: bool = False) -> str:
+        kind = self.name if self.name in STRING_CONTAINERS else TEXT
+        out = []
+        for d in self.descendants():
+            if isinstance(d, TextNode) and d.kind == kind:
+                t = d.strip() if strip else d
+                if t:
+                    out.append(t)
+        return separator.join(out)
+
+    @property
+    def next_siblings(self) -> Iterator:
+        if self.parent is not None:
+            yield from self.parent.contents[self.index + 1:]
+
+class _Target:
+    """lxml parser target that mirrors bs4's string handling (endData on every event)."""
+    def __init__(self, build: bool):
+        self.build = build
+        self.root = Node("[document]")
+        self.stack = [self.root]
+        self.containers: List[Tuple[int, str]] = []  # (stack depth, tag) of open container tags
+        self.buf: List[str] = []
+        self.strings: List[str] = []
+
+    def _flush(self, kind: Optional[str] = None) -> None:
+        if not self.buf:
+            return
+        s = "".join(self.buf)
+        self.buf = []
+        if kind is None:
+            kind = self.containers[-1][1] if self.containers else TEXT
+        if self.build:
+            self.stack[-1].append(TextNode(s, kind))
+        elif kind == TEXT:
+            s = s.strip()
+            if s:
+                self.strings.append(s)
+
+    def start(self, tag, attrib, nsmap=None) -> None:
+        self._flush()
+        if self.build:
+            node = Node(tag, self.stack[-1])
+            self.stack[-1].append(node)
+            self.stack.append(node)
+        else:
+            self.stack.append(tag)
+        if tag in STRING_CONTAINERS:
+            self.containers.append((len(self.stack), tag))
+
+    def end(self, tag) -> None:
+        self._flush()
+        # bs4 pops back to the most recent open tag of this name
+        for i in range(len(self.stack) - 1, 0, -1):
+            name = self.stack[i].name if self.build else self.stack[i]
+            if name == tag:
+                del self.stack[i:]
+                while self.containers and self.containers[-1][0] > len(self.stack):
+                    self.containers.pop()
+                break
+
+    def data(self, data) -> None:
+        self.buf.append(data)
+
+    def _special(self, value: str, kind: str) -> None:
+        self._flush()
+        self.buf.append(value)
+        self._flush(kind)
+
+    def comment(self, text) -> None:
+        self._special(text, "comment")
+
+    def pi(self, target, data=None) -> None:
+        self._special(f"{target} {data or ''}", "pi")
+
+    def doctype(self, name, pubid, system) -> None:
+        value = name or ""
+        if pubid is not None:
+            value += f' PUBLIC "{pubid}"' + (f' "{system}"' if system is not None else "")
+        elif system is not None:
+            value += f' SYSTEM "{system}"'
+        self._special(value, "doctype")
+
+    def close(self):
+        self._flush()
+        return self
+
+def _feed(raw: str, build: bool) -> Optional[_Target]:
+    target = _Target(build)
+    parser = etree.HTMLParser(target=target, strip_cdata=False, recover=True)
+    try:
+        parser.feed(raw)
+        parser.close()
+    except (etree.ParserError, UnicodeDecodeError, LookupError):
+        return None  # bs4 retries such markup with other encodings; let it
+    return target
+
+class LxmlBackend:
+    name = "lxml"
+
+    def text(self, raw: str) -> str:
+        t = _feed(raw or "", build=False)
+        if t is None:
+            return BS4.text(raw)
+        return "\n".join(t.strings)
+
+    def parse(self, raw: str):
+        t = _feed(raw or "", build=True)
+        return BS4.parse(raw) if t is None else t.root
+
+class Bs4Backend:
+    name = "bs4"
+
+    def text(self, raw: str) -> str:
+        return BeautifulSoup(raw or "", "lxml").get_text("\n", strip=True)
+
+    def parse(self, raw: str):
+        return BeautifulSoup(raw or "", "lxml")
+
+class SelectolaxBackend:
+    name = "selectolax"
+
+    def __init__(self):
+        if _SelectolaxParser is None:
+            raise SystemExit("[fatal] --text-backend selectolax needs selectolax (pip install selectolax)")
+
+    def text(self, raw: str) -> str:
+        tree = _SelectolaxParser(raw or "")
+        tree.strip_tags(list(STRING_CONTAINERS))
+        root = tree.root
+        if root is None:
+            return ""
+        return "\n".join(s for s in (n.text(deep=False).strip() for n in root.traverse(include_text=True)
+                                     if n.tag == "-text") if s)
+
+    def parse(self, raw: str):
+        return BS4.parse(raw)  # heading search needs the bs4 tree shape
+
+BS4 = Bs4Backend()
+BACKENDS: Dict[str, Callable[[], object]] = {"bs4": Bs4Backend, "lxml": LxmlBackend, "selectolax": SelectolaxBackend}
+_backend = LxmlBackend()
+
+def set_backend(name: str) -> None:
+    global _backend
+    _backend = BACKENDS[name]()
+
+def backend():
+    return _backend
+
+def html_text(raw: str) -> str:
+    """Same as BeautifulSoup(raw, "lxml").get_text("\\n", strip=True), via the active backend."""
+    return _backend.text(raw)
+
+def parse_html(raw: str):
+    """A bs4 soup, or an equivalent tree from the active backend."""
+    return _backend.parse(raw)
+
+def add_text_args(ap, default: str = "lxml") -> None:
+    ap.add_argument("--text-backend", choices=sorted(BACKENDS), default=default,
+                    help="HTML-to-text backend (bs4 is the slow reference)")
+
+# --------------------------
+# Equivalence check
+# --------------------------
+def main():
+    ap = argparse.ArgumentParser(description="Diff section / corpus / export-sentence outputs between text backends")
+    ap.add_argument("--input", required=True, help="CSV/TSV with the disclosure URLs")
+    ap.add_argument("--url-col", default="Project Url")
+    ap.add_argument("--name-col", default="Project Name")
+    ap.add_argument("--sample", type=int, default=200, help="projects to check (first N rows)")
+    ap.add_argument("--backend", choices=sorted(BACKENDS), default="lxml", help="backend compared against bs4")
+    ap.add_argument("--show", type=int, default=5, help="differing projects to print in full")
+    from ifc_cache import CachingSession, add_cache_args, cache_from_args
+    from ifc_ratelimit import add_rate_args, throttle_from_args
+    add_rate_args(ap)
+    add_cache_args(ap)
+    args = ap.parse_args()
+
+    # the scrapers read the backend from the imported module, not from __main__
+    import ifc_text as text_mod
+    import ifc_disclosures_api_extractor_v4 as amounts_mod
+    import ifc_find_exports_v1 as exports_mod
+    from ifc_common import make_session, open_input_rows, parse_id_and_type, project_api_url
+
+    def outputs(name: str, pid: str, api: str, j) -> Tuple[tuple, float]:
+        text_mod.set_backend(name)
+        exports_mod.configure_text(name)
+        t0 = time.perf_counter()
+        payload = amounts_mod.PayloadStrings(j)
+        sec = payload.section()
+        corpus = payload.corpus(10)
+        exp = exports_mod.scan_payloads(pid, "", "", [(api, j, 200)]).export_sentences
+        return (sec, corpus, exp), time.perf_counter() - t0
+
+    cache = cache_from_args(args)
+    checked, diffs, times = 0, {"section": 0, "corpus": 0, "exports": 0}, {"bs4": 0.0, args.backend: 0.0}
+    with make_session() as s:
+        session = throttle_from_args(s, args)
+        if cache:
+            session = CachingSession(session, cache, offline=args.offline)
+        for url, _ in open_input_rows(args.input, args.url_col, args.name_col, args.sample):
+            pid, doc_type = parse_id_and_type(url)
+            if not pid or doc_type not in ("SPI", "SII"):
+                continue
+            api = project_api_url(doc_type, pid)
+            try:
+                j = session.get(api, timeout=30).json()
+            except Exception as e:
+                print(f"[skip] {url}: {type(e).__name__}")
+                continue
+            ref, t_ref = outputs("bs4", pid, api, j)
+            got, t_got = outputs(args.backend, pid, api, j)
+            times["bs4"] += t_ref
+            times[args.backend] += t_got
+            checked += 1
+            bad = [k for k, a, b in zip(diffs, ref, got) if a != b]
+            for k in bad:
+                diffs[k] += 1
+            if bad and sum(diffs.values()) <= args.show:
+                print(f"[diff] {url}: {', '.join(bad)}")
+                for k, a, b in zip(diffs, ref, got):
+                    if k in bad:
+                        print(f"  bs4: {str(a)[:300]!r}\n  {args.backend}: {str(b)[:300]!r}")
+    if cache:
+        cache.close()
+    speed = times["bs4"] / times[args.backend] if times[args.backend] else 0.0
+    print(f"[check] {checked} projects; differing: " + ", ".join(f"{k}={v}" for k, v in diffs.items()))
+    print(f"[check] text time bs4={times['bs4']:.2f}s {args.backend}={times[args.backend]:.2f}s ({speed:.1f}x)")
+    raise SystemExit(1 if any(diffs.values()) else 0)
+
+if __name__ == "__main__":
+    main()
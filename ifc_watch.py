@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Watch the disclosure listing and process only what is new.
+
+Each poll fetches the listing endpoints (by default the landing-page
+listing the export scanner knows about; add searchprovider queries with
+--listing URL). It picks out every project entry, compares each with a
+local seen-set (SQLite) and runs only new projects, and projects whose
+listing entry changed, through the pipeline's analyzers. The rows are
+appended to the outputs. A listing whose body is unchanged since the last
+poll is not parsed again. With --state, listing and project requests are
+conditional, so a quiet poll costs a few 304s. With --cache-dir, only PDFs
+are cached: the listing and the API endpoints are always fetched fresh.
+
+  python -u ifc_watch.py --seen watch.sqlite --state refresh_state.sqlite \\
+    --out exports=out_ifc_exports.csv --out amounts=out_ifc_sections_api.csv --interval 900
+
+A project is listed as a dict with a project number / id field (and
+optionally a document type and name), or as a project-detail URL
+anywhere in the listing. Without a document type it is treated as SII;
+both analyzers also read the SPI variant. An updated project gets a
+second row in the outputs, so the last row per URL is the current one.
+On the first run, --skip-existing records the current listing without
+processing it; only later disclosures are scraped.
+"""
+
+import argparse, hashlib, json, re, sqlite3, threading, time
+from typing import Any, Dict, List, Optional, Tuple
+
+import ifc_disclosures_api_extractor_v4 as amounts_mod
+from ifc_cache import CachingSession, add_cache_args, cache_from_args
+from ifc_checkpoint import CheckpointWriter
+from ifc_find_exports_v1 import global_endpoints
+from ifc_pipeline import ANALYZERS, fetch_endpoint, parse_out_specs, process_project
+from ifc_ratelimit import add_rate_args, throttle_from_args
+from ifc_state import ConditionalSession, add_state_args, state_from_args
+from ifc_text import add_text_args, set_backend
+from ifc_common import API_BASE, HostCappedSession, add_concurrency_args, make_session, run_ordered
+
+DETAIL_URL = "https://disclosures.ifc.org/project-detail/{doc_type}/{pid}"
+DETAIL_RE = re.compile(r"project-detail/(SPI|SII)/0*(\d+)", re.IGNORECASE)
+ID_KEYS = ("projectnumber", "projectno", "projectid", "project_id", "projid")
+TYPE_KEYS = ("documenttype", "doctype", "disclosuretype", "type")
+NAME_KEYS = ("projectname", "project_name", "name", "title")
+INDUSTRY_KEYS = ("industry", "sector", "industryname", "sectorname")
+
+# --------------------------
+# Listing
+# --------------------------
+class Entry:
+    __slots__ = ("key", "url", "name", "fingerprint", "industry")
+
+    def __init__(self, pid: str, doc_type: str, name: str, fingerprint: str, industry: str = ""):
+        self.key = pid
+        self.url = DETAIL_URL.format(doc_type=doc_type, pid=pid)
+        self.name = name
+        self.fingerprint = fingerprint
+        self.industry = industry
+
+def _digest(obj: Any) -> str:
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def _field(d: Dict[str, Any], keys: Tuple[str, ...]) -> str:
+    for k in keys:
+        v = d.get(k)
+        if v not in (None, "") and not isinstance(v, (dict, list)):
+            return str(v).strip()
+    return ""
+
+def listing_entries(j: Any) -> Dict[str, Entry]:
+    """Project number -> Entry for every project the listing JSON mentions."""
+    found: Dict[str, Entry] = {}
+
+    def add(e: Entry) -> None:
+        prev = found.get(e.key)
+        if prev is None:
+            found[e.key] = e
+        else:  # listed twice: either copy changing counts as an update
+            prev.fingerprint = _digest([prev.fingerprint, e.fingerprint])
+            prev.name, prev.industry = prev.name or e.name, prev.industry or e.industry
+
+    def visit(obj: Any) -> None:
+        if isinstance(obj, dict):
+            low = {k.lower().replace(" ", ""): v for k, v in obj.items() if isinstance(k, str)}
+            pid = _field(low, ID_KEYS).lstrip("0")
+            if pid.isdigit():
+                m = DETAIL_RE.search(json.dumps(obj))
+                doc_type = _field(low, TYPE_KEYS).upper()
+                doc_type = doc_type if doc_type in ("SPI", "SII") else (m.group(1).upper() if m else "SII")
+                add(Entry(pid, doc_type, _field(low, NAME_KEYS), _digest(obj), _field(low, INDUSTRY_KEYS)))
+                return
+            for v in obj.values():
+                visit(v)
+        elif isinstance(obj, list):
+            for v in obj:
+                visit(v)
+        elif isinstance(obj, str):
+            for m in DETAIL_RE.finditer(obj):
+                if m.group(2) not in found:
+                    add(Entry(m.group(2), m.group(1).upper(), "", _digest(m.group(0))))
+
+    visit(j)
+    return found
+
+class SeenSet:
+    """Projects already processed, with the listing fingerprint they were processed at."""
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS seen (
+            key TEXT PRIMARY KEY, url TEXT, fingerprint TEXT, first_seen REAL, processed_at REAL)""")
+        self._db.commit()
+        self._seen = {k: fp for k, fp in self._db.execute("SELECT key, fingerprint FROM seen")}
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def delta(self, entries: Dict[str, Entry]) -> Tuple[List[Entry], List[Entry]]:
+        """(new, updated) entries, in listing order."""
+        new = [e for k, e in entries.items() if k not in self._seen]
+        updated = [e for k, e in entries.items() if k in self._seen and self._seen[k] != e.fingerprint]
+        return new, updated
+
+    def mark(self, e: Entry) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute("""INSERT INTO seen VALUES (?,?,?,?,?) ON CONFLICT(key) DO UPDATE SET
+                                url=excluded.url, fingerprint=excluded.fingerprint, processed_at=excluded.processed_at""",
+                             (e.key, e.url, e.fingerprint, now, now))
+            self._db.commit()
+            self._seen[e.key] = e.fingerprint
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+class Listing:
+    """Polls the listing URLs; a body identical to the last poll's is not parsed again."""
+    def __init__(self, urls: List[str]):
+        self.urls = urls
+        self._digests: Dict[str, Optional[str]] = {}
+        self._entries: Dict[str, Dict[str, Entry]] = {}
+
+    def poll(self, session) -> Dict[str, Entry]:
+        """All listed entries, first listing first."""
+        for url in self.urls:
+            got = fetch_endpoint(session, url)
+            if got.error is not None or not got.ok:
+                print(f"[watch] listing {url}: {got.error or got.status}; keeping the last copy")
+                continue
+            if got.digest != self._digests.get(url):
+                self._digests[url] = got.digest
+                self._entries[url] = listing_entries(got.json)
+        merged: Dict[str, Entry] = {}
+        for url in self.urls:
+            for k, e in self._entries.get(url, {}).items():
+                merged.setdefault(k, e)
+        return merged
+
+# --------------------------
+# Main
+# --------------------------
+def main():
+    ap = argparse.ArgumentParser(description="Poll the IFC disclosure listing; scrape new and updated projects")
+    ap.add_argument("--seen", required=True, help="SQLite seen-set, kept between runs")
+    ap.add_argument("--out", action="append", default=[], metavar="NAME=PATH",
+                    help=f"analyzer output, appended to; repeatable. NAME in {sorted(ANALYZERS)}")
+    ap.add_argument("--listing", action="append", default=[], metavar="URL",
+                    help="listing endpoint to poll; repeatable (default: the landing-page listing)")
+    ap.add_argument("--interval", type=float, default=900, help="seconds between polls")
+    ap.add_argument("--once", action="store_true", help="poll once and exit (for cron)")
+    ap.add_argument("--skip-existing", action="store_true",
+                    help="with an empty seen-set, record the current listing without processing it")
+    ap.add_argument("--industry", default="",
+                    help="only projects whose listed industry/sector contains this (unlisted ones pass)")
+    add_concurrency_args(ap)
+    add_rate_args(ap)
+    amounts_mod.add_pdf_args(ap)
+    amounts_mod.add_sibling_args(ap)
+    add_cache_args(ap)
+    add_state_args(ap)
+    add_text_args(ap)
+    args = ap.parse_args()
+    set_backend(args.text_backend)
+    outs = parse_out_specs(args.out)
+    if not outs:
+        raise SystemExit("[fatal] nothing to do: give --out NAME=PATH")
+    if args.offline:
+        raise SystemExit("[fatal] --offline: a cached listing never changes, so there is nothing to watch")
+    cache = cache_from_args(args)
+    state = state_from_args(args)
+    amounts_mod.configure_pdf(args)
+    amounts_mod.configure_sibling(args)
+
+    seen = SeenSet(args.seen)
+    listing = Listing(args.listing or global_endpoints())
+    analyzers = [ANALYZERS[name]() for name in outs]
+    writers = {a.name: CheckpointWriter(outs[a.name], a.fieldnames, resume=True) for a in analyzers}
+    baseline = args.skip_existing and not len(seen)
+
+    def work(e: Entry):
+        return e, process_project(session, e.url, e.name, analyzers, state)
+
+    polls = 0
+    completed = False
+    try:
+        with make_session(args.workers) as s:
+            session = throttled = throttle_from_args(HostCappedSession(s, args.per_host), args)
+            if state:
+                session = ConditionalSession(session, state)
+            fresh = session
+            if cache:  # PDFs only; a cached listing or project payload would hide every change
+                session = CachingSession(session, cache, bypass=API_BASE)
+            while True:
+                t0 = time.monotonic()
+                polls += 1
+                entries = listing.poll(fresh)
+                # filtered out before the delta: never processed, never counted as new, never marked seen
+                wanted = {k: e for k, e in entries.items()
+                          if not args.industry or not e.industry or args.industry.lower() in e.industry.lower()}
+                new, updated = seen.delta(wanted)
+                if baseline:
+                    for e in new:
+                        seen.mark(e)
+                    print(f"[watch] baseline: {len(new)} listed projects recorded, not processed")
+                    new, baseline = [], False
+                todo = new + updated
+                for e, results in run_ordered(work, todo, args.workers):
+                    for name, row in results.items():
+                        writers[name].writerow(row)
+                    # only once its rows are on disk; a failed project is retried next poll
+                    if not any(str(r.get("fetch_status", "")).startswith("error:") for r in results.values()):
+                        seen.mark(e)
+                    print(f"[watch] {e.url}")
+                listed = f"{len(entries)} listed" + (f" ({len(wanted)} in {args.industry!r})" if args.industry else "")
+                print(f"[watch] poll {polls}: {listed}, {len(new)} new, {len(updated)} updated, "
+                      f"{len(todo)} processed ({time.monotonic() - t0:.1f}s)")
+                if args.once:
+                    break
+                time.sleep(max(0.0, args.interval - (time.monotonic() - t0)))
+        completed = True
+    except KeyboardInterrupt:
+        completed = True  # every appended row is complete
+        print("[watch] stopped")
+    finally:
+        for w in writers.values():
+            w.close(completed=completed)
+        seen.close()
+        amounts_mod.close_pdf()
+        if cache:
+            print(f"[cache] {cache.stats()}")
+            cache.close()
+        if state:
+            print(f"[incremental] {state.stats()}")
+            state.close()
+    print(f"[rate] {throttled.limiter.stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Error paths of the dollar-value extractor: a failed project must become a row, not abort the run."""
+
+from dataclasses import asdict
+
+import requests
+
+import ifc_disclosures_api_extractor_v4 as amounts_mod
+from ifc_batch import extract_amounts
+
+URL = "https://disclosures.ifc.org/project-detail/SII/40001/test"
+
+class DownSession:
+    """Every request fails as if the API were unreachable."""
+    def get(self, url, **kw):
+        raise requests.ConnectionError("unreachable")
+
+def check(row, status_prefix):
+    d = asdict(row)
+    assert list(d)[:len(amounts_mod.OUT_HEADER)] == amounts_mod.OUT_HEADER
+    assert d["fetch_status"].startswith(status_prefix)
+    assert d["amounts_json"] == "" and d["ifc_investment_usd"] is None
+
+def test_error_row():
+    check(amounts_mod.error_row(URL, "P", ValueError("boom")), "error:ValueError:boom")
+
+def test_fetch_one_bad_url():
+    check(amounts_mod.fetch_one(DownSession(), "", "P"), "error:bad_url_format")
+
+def test_fetch_one_api_down():
+    row = amounts_mod.fetch_one(DownSession(), URL, "P")
+    check(row, "error:api:ConnectionError")
+    assert row.project_id == "40001" and row.used_json_endpoint
+
+def test_batch_keeps_going():
+    rows = list(extract_amounts([URL, "", URL.replace("40001", "40002")], session=DownSession(), workers=2))
+    assert [r.fetch_status.split(":")[1] for r in rows] == ["api", "bad_url_format", "api"]